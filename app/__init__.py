@@ -1,10 +1,10 @@
 from flask import Flask
 
 from instance.config import app_config
-from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+from .routing import RoutingSQLAlchemy
 
-db = SQLAlchemy()
+db = RoutingSQLAlchemy()
 
 def create_app(config_name):
     app = Flask(__name__, instance_relative_config=True)
@@ -15,6 +15,19 @@ def create_app(config_name):
 
     db.init_app(app)
 
+    from .decorators.caching import cache
+    cache.init_app(app)
+
+    from .catalog import catalog
+    catalog.init_app(app)
+
+    from .metrics import metrics
+    metrics.init_app(app)
+
+    # registered after metrics, so that the compressed size is measured
+    from .compression import compression
+    compression.init_app(app)
+
     from .api_v1 import api as api_blueprint
     app.register_blueprint(api_blueprint, url_prefix='/api/v1')
 
@@ -2,4 +2,4 @@ from flask import Blueprint
 
 api = Blueprint('api', __name__)
 
-from . import agencies, samples, results, clients, batches, errors, categories, infos, libraries, positions, projects, roadmaps
+from . import agencies, samples, results, clients, batches, contacts, errors, categories, infos, libraries, positions, projects, refs, roadmaps, metrics, reports
@@ -2,10 +2,13 @@ from flask import request
 from . import api
 from ..models import Agency
 from .. import db
-from ..decorators import json, paginate
+from ..decorators import json, paginate, cached
+from ..counters import status_summary
+from ..stats import cohort_stats
 
 
 @api.route('/agencies/', methods=['GET'])
+@cached('agencies')
 @json
 @paginate('agencies')
 def get_agencies():
@@ -23,11 +26,28 @@ def new_agency():
 
 
 @api.route('/agencies/<int:id>', methods=['GET'])
+@cached('agencies')
 @json
 def get_agency(id):
     return Agency.query.get_or_404(id)
 
 
+@api.route('/agencies/<int:id>/stats', methods=['GET'])
+@json
+def get_agency_stats(id):
+    agency = Agency.query.get_or_404(id)
+    return dict(cohort_stats('agencies', agency.id),
+                agency_url=agency.get_url())
+
+
+@api.route('/agencies/<int:id>/summary', methods=['GET'])
+@json
+def get_agency_summary(id):
+    agency = Agency.query.get_or_404(id)
+    return dict(status_summary('agencies', agency.id),
+                agency_url=agency.get_url())
+
+
 @api.route('/agencies/<int:id>', methods=['PUT'])
 @json
 def edit_agency(id):
@@ -1,13 +1,18 @@
-from flask import jsonify, request
+from flask import abort, jsonify, request
 from . import api
 from .. import db
-from ..decorators import json, paginate
+from ..decorators import json, paginate, cached
+from ..counters import status_summary
+from ..dossier import batch_dossier
 from ..models import Batch, Agency
+from ..stats import cohort_stats
 
 
 @api.route('/batches', methods=['GET'])
+@cached('batches')
 @json
-@paginate('batches')
+@paginate('batches', eager=('agency', 'contact', 'position', 'project',
+                              'roadmap'))
 def get_batches():
     return Batch.query
 
@@ -21,8 +26,10 @@ def get_batches():
 #     return {}, 201, {'location': batch.get_url()}
 
 @api.route('/agencies/<int:id>/batches', methods=['GET'])
+@cached('agencies', 'batches')
 @json
-@paginate('batches')
+@paginate('batches', eager=('agency', 'contact', 'position', 'project',
+                              'roadmap'))
 def get_agency_batches(id):
     agency = Agency.query.get_or_404(id)
     return agency.batches
@@ -38,29 +45,35 @@ def add_agency_batches(id):
     db.session.commit()
     return {}, 201, {'location': batch.get_url()}
 
-@api.route('/agencies/<int:id>/contacts', methods=['GET'])
+@api.route('/batches/<int:id>', methods=['GET'])
+@cached('batches')
 @json
-@paginate('contacts')
-def get_agency_contacts(id):
-    agency = Agency.query.get_or_404(id)
-    return agency.contacts
+def get_batch(id):
+    return Batch.query.get_or_404(id)
 
 
-@api.route('/agencies/<int:id>/contacts', methods=['POST'])
+@api.route('/batches/<int:id>/dossier', methods=['GET'])
 @json
-def add_agency_contacts(id):
-    agency = Agency.query.get_or_404(id)
-    contact = Contact(agency=agency)
-    contact.import_data(request.json)
-    db.session.add(batch)
-    db.session.commit()
-    return {}, 201, {'location': contact.get_url()}
+def get_batch_dossier(id):
+    response = batch_dossier(id)
+    if response is None:
+        abort(404)
+    return response
 
 
-@api.route('/batches/<int:id>', methods=['GET'])
+@api.route('/batches/<int:id>/stats', methods=['GET'])
 @json
-def get_batch(id):
-    return Batch.query.get_or_404(id)
+def get_batch_stats(id):
+    batch = Batch.query.get_or_404(id)
+    return dict(cohort_stats('batches', batch.id), batch_url=batch.get_url())
+
+
+@api.route('/batches/<int:id>/summary', methods=['GET'])
+@json
+def get_batch_summary(id):
+    batch = Batch.query.get_or_404(id)
+    return dict(status_summary('batches', batch.id),
+                batch_url=batch.get_url())
 
 
 @api.route('/batches/<int:id>', methods=['PUT'])
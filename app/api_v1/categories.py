@@ -1,15 +1,17 @@
-from flask import request
+from flask import abort, request
 from . import api
+from ..catalog import catalog
 from ..models import Category, Info
 from .. import db
-from ..decorators import json, paginate
+from ..decorators import json, paginate, cached
 
 
 @api.route('/categories/', methods=['GET'])
+@cached('categories')
 @json
 @paginate('categories')
 def get_categories():
-    return Category.query
+    return catalog.get_categories()
 
 
 @api.route('/categories', methods=['POST'])
@@ -23,9 +25,13 @@ def new_category():
 
 
 @api.route('/categories/<int:id>', methods=['GET'])
+@cached('categories')
 @json
 def get_category(id):
-    return Category.query.get_or_404(id)
+    category = catalog.get_category(id)
+    if category is None:
+        abort(404)
+    return category
 
 
 @api.route('/categories/<int:id>', methods=['PUT'])
@@ -46,11 +52,14 @@ def delete_categorie(id):
     return {}
 
 @api.route('/infos/<int:id>/categories', methods=['GET'])
+@cached('infos', 'category_infos', 'categories')
 @json
 @paginate('categories')
 def get_info_categories(id):
-    info = Info.query.get_or_404(id)
-    return info.categories
+    categories = catalog.get_info_categories(id)
+    if categories is None:
+        abort(404)
+    return categories
 
 
 @api.route('/infos/<int:id>/categories', methods=['POST'])
@@ -1,11 +1,15 @@
 from flask import request, jsonify
 from .. import db
 from . import api
-from ..decorators import json, paginate
-from ..models import Client
+from ..decorators import json, paginate, cached
+from ..exceptions import ValidationError
+from ..fields import load_fields, requested_fields
+from ..models import Client, ClientExtra, ExtraKey
+from ..signals import record_change
 
 
 @api.route('/clients', methods=['GET'])
+@cached('clients', 'extra_keys', 'client_extras')
 @json
 @paginate('clients')
 def get_clients():
@@ -23,9 +27,10 @@ def new_client():
 
 
 @api.route('/clients/<int:id>', methods=['GET'])
+@cached('clients')
 @json
 def get_client(id):
-    return Client.query.get_or_404(id)
+    return load_fields(Client.query, requested_fields()).get_or_404(id)
 
 
 @api.route('/clients/<int:id>', methods=['PUT'])
@@ -45,3 +50,46 @@ def delete_client(id):
     db.session.delete(client)
     db.session.commit()
     return {}
+
+
+@api.route('/clients/extra-keys', methods=['GET'])
+@cached('extra_keys')
+@json
+@paginate('extra_keys')
+def get_extra_keys():
+    return ExtraKey.query
+
+
+@api.route('/clients/extra-keys', methods=['POST'])
+@json
+def new_extra_key():
+    key = ExtraKey()
+    key.import_data(request.json)
+    if ExtraKey.query.filter_by(name=key.name).first() is not None:
+        raise ValidationError('Invalid extra key: {0} is already promoted'
+                              .format(key.name))
+    db.session.add(key)
+    db.session.flush()
+    key.populate()
+    record_change(db.session, ClientExtra.__tablename__, 'insert')
+    db.session.commit()
+    return {}, 201, {'location': key.get_url()}
+
+
+@api.route('/clients/extra-keys/<name>', methods=['GET'])
+@cached('extra_keys')
+@json
+def get_extra_key(name):
+    return ExtraKey.query.filter_by(name=name).first_or_404()
+
+
+@api.route('/clients/extra-keys/<name>', methods=['DELETE'])
+@json
+def delete_extra_key(name):
+    key = ExtraKey.query.filter_by(name=name).first_or_404()
+    ClientExtra.query.filter_by(key_id=key.id).delete(
+        synchronize_session=False)
+    record_change(db.session, ClientExtra.__tablename__, 'delete')
+    db.session.delete(key)
+    db.session.commit()
+    return {}
@@ -1,17 +1,19 @@
 from flask import request
 from . import api
-from ..models import Contact, Info
+from ..models import Agency, Contact
 from .. import db
-from ..decorators import json, paginate
+from ..decorators import json, paginate, cached
 
 
 @api.route('/contacts/', methods=['GET'])
+@cached('contacts')
 @json
-@paginate('contacts')
+@paginate('contacts', eager=('agency',))
 def get_contacts():
     return Contact.query
 
 @api.route('/contacts/<int:id>', methods=['GET'])
+@cached('contacts')
 @json
 def get_contact(id):
     return Contact.query.get_or_404(id)
@@ -35,8 +37,9 @@ def delete_contact(id):
     return {}
 
 @api.route('/agencies/<int:id>/contacts', methods=['GET'])
+@cached('agencies', 'contacts')
 @json
-@paginate('contacts')
+@paginate('contacts', eager=('agency',))
 def get_agency_contacts(id):
     agency = Agency.query.get_or_404(id)
     return agency.contacts
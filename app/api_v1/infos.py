@@ -1,15 +1,17 @@
-from flask import jsonify, request
+from flask import abort, jsonify, request
 from . import api
 from .. import db
-from ..decorators import json, paginate
+from ..decorators import json, paginate, cached
+from ..catalog import catalog
 from ..models import Info, Category
 
 
 @api.route('/infos', methods=['GET'])
+@cached('infos')
 @json
 @paginate('infos')
 def get_infos():
-    return Info.query
+    return catalog.get_infos()
 
 @api.route('/infos', methods=['POST'])
 @json
@@ -21,11 +23,14 @@ def new_info():
     return {}, 201, {'location': info.get_url()}
 
 @api.route('/categories/<int:id>/infos', methods=['GET'])
+@cached('categories', 'category_infos', 'infos')
 @json
 @paginate('infos')
 def get_category_infos(id):
-    category = Category.query.get_or_404(id)
-    return category.infos
+    infos = catalog.get_category_infos(id)
+    if infos is None:
+        abort(404)
+    return infos
 
 
 @api.route('/categories/<int:id>/infos', methods=['POST'])
@@ -40,9 +45,13 @@ def add_category_infos(id):
 
 
 @api.route('/infos/<int:id>', methods=['GET'])
+@cached('infos')
 @json
 def get_info(id):
-    return Info.query.get_or_404(id)
+    info = catalog.get_info(id)
+    if info is None:
+        abort(404)
+    return info
 
 
 @api.route('/infos/<int:id>', methods=['PUT'])
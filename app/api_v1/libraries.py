@@ -1,11 +1,12 @@
 from flask import jsonify, request
 from . import api
 from .. import db
-from ..decorators import json, paginate
+from ..decorators import json, paginate, cached
 from ..models import Library
 
 
 @api.route('/libraries', methods=['GET'])
+@cached('libraries')
 @json
 @paginate('libraries')
 def get_libraries():
@@ -21,8 +22,9 @@ def new_librarie():
     return {}, 201, {'location': librarie.get_url()}
 
 @api.route('/libraries/<int:id>', methods=['GET'])
+@cached('libraries')
 @json
-def get_librarie(id):
+def get_library(id):
     return Library.query.get_or_404(id)
 
 @api.route('/libraries/<int:id>', methods=['PUT'])
@@ -0,0 +1,9 @@
+from flask import current_app
+from . import api
+from ..metrics import metrics
+
+
+@api.route('/_metrics', methods=['GET'])
+def get_metrics():
+    return current_app.response_class(
+        metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -1,11 +1,12 @@
 from flask import jsonify, request
 from . import api
 from .. import db
-from ..decorators import json, paginate
+from ..decorators import json, paginate, cached
 from ..models import Position
 
 
 @api.route('/positions', methods=['GET'])
+@cached('positions')
 @json
 @paginate('positions')
 def get_positions():
@@ -21,6 +22,7 @@ def new_position():
     return {}, 201, {'location': position.get_url()}
 
 @api.route('/positions/<int:id>', methods=['GET'])
+@cached('positions')
 @json
 def get_position(id):
     return Position.query.get_or_404(id)
@@ -1,11 +1,13 @@
 from flask import jsonify, request
 from . import api
 from .. import db
-from ..decorators import json, paginate
+from ..decorators import json, paginate, cached
 from ..models import Project
+from ..stats import cohort_stats
 
 
 @api.route('/projects', methods=['GET'])
+@cached('projects')
 @json
 @paginate('projects')
 def get_projects():
@@ -21,10 +23,19 @@ def new_project():
     return {}, 201, {'location': project.get_url()}
 
 @api.route('/projects/<int:id>', methods=['GET'])
+@cached('projects')
 @json
 def get_project(id):
     return Project.query.get_or_404(id)
 
+
+@api.route('/projects/<int:id>/stats', methods=['GET'])
+@json
+def get_project_stats(id):
+    project = Project.query.get_or_404(id)
+    return dict(cohort_stats('projects', project.id),
+                project_url=project.get_url())
+
 @api.route('/projects/<int:id>', methods=['PUT'])
 @json
 def update_project(id):
@@ -1,22 +1,27 @@
-from flask import jsonify, request
+from flask import abort, jsonify, request
 from . import api
 from .. import db
-from ..decorators import json, paginate
+from ..decorators import json, paginate, cached
+from ..catalog import catalog
 from ..models import Ref, Info
 
 
 @api.route('/refs', methods=['GET'])
+@cached('refs')
 @json
-@paginate('refs')
+@paginate('refs', eager=('info',))
 def get_refs():
-    return Ref.query
+    return catalog.get_refs()
 
 @api.route('/infos/<int:id>/refs', methods=['GET'])
+@cached('infos', 'refs')
 @json
-@paginate('refs')
+@paginate('refs', eager=('info',))
 def get_info_refs(id):
-    info = Info.query.get_or_404(id)
-    return info.refs
+    refs = catalog.get_info_refs(id)
+    if refs is None:
+        abort(404)
+    return refs
 
 
 @api.route('/infos/<int:id>/refs', methods=['POST'])
@@ -31,9 +36,13 @@ def add_info_refs(id):
 
 
 @api.route('/refs/<int:id>', methods=['GET'])
+@cached('refs')
 @json
 def get_ref(id):
-    return Ref.query.get_or_404(id)
+    ref = catalog.get_ref(id)
+    if ref is None:
+        abort(404)
+    return ref
 
 
 @api.route('/refs/<int:id>', methods=['PUT'])
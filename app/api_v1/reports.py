@@ -0,0 +1,45 @@
+from flask import current_app
+from sqlalchemy.orm import defer
+from . import api
+from ..decorators import json, paginate
+from ..models import Batch, ReportJob
+from ..reports import submit_report
+
+# job routes are not cached, as the jobs are updated by the worker processes
+
+
+@api.route('/batches/<int:id>/reports', methods=['POST'])
+@json
+def new_batch_report(id):
+    batch = Batch.query.get_or_404(id)
+    job = submit_report(batch)
+    return job, 202, {'location': job.get_url()}
+
+
+@api.route('/batches/<int:id>/reports', methods=['GET'])
+@json
+@paginate('reports')
+def get_batch_reports(id):
+    batch = Batch.query.get_or_404(id)
+    return ReportJob.query.options(defer('report')) \
+        .filter(ReportJob.batch_id == batch.id)
+
+
+@api.route('/reports/<int:id>', methods=['GET'])
+@json
+def get_report(id):
+    return ReportJob.query.options(defer('report')).get_or_404(id)
+
+
+@api.route('/reports/<int:id>/download', methods=['GET'])
+@json
+def download_report(id):
+    job = ReportJob.query.get_or_404(id)
+    if job.status != 'done':
+        return {'status': 409, 'error': 'conflict',
+                'message': 'the report is ' + job.status}, 409
+    return current_app.response_class(
+        (job.report.text, '\n'), mimetype='application/json',
+        headers={'Content-Disposition':
+                 'attachment; filename=batch-{0}-report.json'.format(
+                     job.batch_id)})
@@ -1,19 +1,23 @@
 from flask import request
 from .. import db
-from ..decorators import json, paginate
-from ..models import Sample, Result
+from ..decorators import json, paginate, cached
+from ..fields import load_fields, requested_fields
+from ..catalog import catalog
+from ..models import Batch, Sample, Result
 from . import api
 
 
 @api.route('/results', methods=['GET'])
+@cached('results')
 @json
-@paginate('clients')
+@paginate('results', cursor=True, stream=True, totals='approximate')
 def get_results():
     return Result.query
 
 @api.route('/samples/<int:id>/results', methods=['GET'])
+@cached('samples', 'results')
 @json
-@paginate('results')
+@paginate('results', cursor=True, totals='cached')
 def get_sample_results(id):
     sample = Sample.query.get_or_404(id)
     return sample.results
@@ -24,16 +28,17 @@ def get_sample_results(id):
 def new_sample_result(id):
     sample = Sample.query.get_or_404(id)
     result = Result(sample=sample)
-    result.import_date(request.json)
+    result.import_data(request.json)
     db.session.add(result)
     db.session.commit()
     return {}, 201, {'location': result.get_url()}
 
 
 @api.route('/results/<int:id>', methods=['GET'])
+@cached('results')
 @json
 def get_result(id):
-    return Result.query.get_or_404(id)
+    return load_fields(Result.query, requested_fields()).get_or_404(id)
 
 
 @api.route('/results/<int:id>', methods=['PUT'])
@@ -53,3 +58,22 @@ def delete_result(id):
     db.session.delete(result)
     db.session.commit()
     return {}
+
+
+@api.route('/results/<int:id>/interpretation', methods=['GET'])
+@cached('results', 'infos', 'refs')
+@json
+def get_result_interpretation(id):
+    result = Result.query.get_or_404(id)
+    return catalog.get_indicators().interpret([result])[0]
+
+
+@api.route('/batches/<int:id>/interpretation', methods=['GET'])
+@cached('batches', 'samples', 'results', 'infos', 'refs')
+@json
+def get_batch_interpretation(id):
+    batch = Batch.query.get_or_404(id)
+    results = Result.query.join(Sample).filter(Sample.batch_id == batch.id) \
+        .order_by(Result.id).all()
+    return {'batch_url': batch.get_url(),
+            'results': catalog.get_indicators().interpret(results)}
@@ -1,11 +1,12 @@
 from flask import jsonify, request
 from . import api
 from .. import db
-from ..decorators import json, paginate
+from ..decorators import json, paginate, cached
 from ..models import Roadmap
 
 
 @api.route('/roadmaps', methods=['GET'])
+@cached('roadmaps')
 @json
 @paginate('roadmaps')
 def get_roadmaps():
@@ -21,6 +22,7 @@ def new_roadmap():
     return {}, 201, {'location': roadmap.get_url()}
 
 @api.route('/roadmaps/<int:id>', methods=['GET'])
+@cached('roadmaps')
 @json
 def get_roadmap(id):
     return Roadmap.query.get_or_404(id)
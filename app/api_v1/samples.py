@@ -1,20 +1,31 @@
-from flask import request
+from flask import current_app, request, url_for
+from sqlalchemy.exc import IntegrityError
 from . import api
 from .. import db
-from ..decorators import json, paginate
+from ..exceptions import ValidationError
+from ..barcodes import lookup_samples
+from ..counters import count_inserts
+from ..fields import requested_fields, select_fields
+from ..signals import record_change
+from ..utils import read_items
+from ..decorators import json, paginate, cached
 from ..models import Sample, Batch, Client
 
 
 @api.route('/samples', methods=['GET'])
+@cached('samples')
 @json
-@paginate('samples')
+@paginate('samples', cursor=True, stream=True, totals='approximate',
+           eager=('batch', 'client', 'library'))
 def get_samples():
     return Sample.query
 
 
 @api.route('/batches/<int:id>/samples', methods=['GET'])
+@cached('batches', 'samples')
 @json
-@paginate('samples')
+@paginate('samples', cursor=True, stream=True, totals='cached',
+           eager=('batch', 'client', 'library'))
 def get_batch_samples(id):
     batch = Batch.query.get_or_404(id)
     return batch.samples
@@ -27,19 +38,84 @@ def add_batch_sample(id):
     sample = Sample(batch=batch)
     sample.import_data(request.json)
     db.session.add(sample)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # the pmid was registered by a concurrent request after it was
+        # checked
+        db.session.rollback()
+        raise ValidationError('Invalid sample: duplicate pmid {0}'.format(
+            sample.pmid))
     return {}, 201, {'location': sample.get_url()}
 
 
+@api.route('/batches/<int:id>/samples/bulk', methods=['POST'])
+@json
+def add_batch_samples(id):
+    batch = Batch.query.get_or_404(id)
+    items = read_items()
+    if len(items) > current_app.config['BULK_MAX_ITEMS']:
+        raise ValidationError('Too many samples: at most {0} are allowed'
+                              .format(current_app.config['BULK_MAX_ITEMS']))
+    rows, errors = Sample.import_bulk(items, batch_id=batch.id)
+    if errors:
+        return {'status': 400, 'error': 'bad request',
+                'message': 'invalid samples', 'errors': errors}, 400
+
+    # insert all the samples with a single executemany statement
+    if rows:
+        try:
+            db.session.execute(Sample.__table__.insert(), rows)
+        except IntegrityError:
+            # pmids registered by a concurrent request after they were
+            # checked
+            db.session.rollback()
+            raise ValidationError('Invalid samples: duplicate pmid')
+        record_change(db.session, Sample.__tablename__, 'insert')
+        count_inserts(db.session, 'samples',
+                      ((row['batch_id'], row.get('status')) for row in rows))
+    db.session.commit()
+    return {'created': len(rows)}, 201, \
+        {'location': url_for('api.get_batch_samples', id=batch.id,
+                             _external=True)}
+
+
 @api.route('/clients/<int:id>/samples', methods=['GET'])
+@cached('clients', 'samples')
 @json
-@paginate('samples')
+@paginate('samples', cursor=True, totals='cached',
+           eager=('batch', 'client', 'library'))
 def get_client_samples(id):
     client = Client.query.get_or_404(id)
     return client.samples
 
 
+@api.route('/samples/lookup', methods=['GET'])
+@json
+def lookup_barcodes():
+    barcodes = []
+    for barcode in request.args.get('barcodes', '').split(','):
+        barcode = barcode.strip()
+        if barcode and barcode not in barcodes:
+            barcodes.append(barcode)
+    if not barcodes:
+        raise ValidationError('Invalid request: no barcodes given')
+    if len(barcodes) > current_app.config['BARCODE_LOOKUP_MAX']:
+        raise ValidationError('Too many barcodes: at most {0} are allowed'
+                              .format(current_app.config['BARCODE_LOOKUP_MAX']))
+    fields = requested_fields()
+    found = lookup_samples(barcodes)
+    return {
+        'barcodes': [{'barcode': barcode,
+                      'samples': [select_fields(data, fields)
+                                  for data in found[barcode]]}
+                     for barcode in barcodes if found[barcode]],
+        'missing': [barcode for barcode in barcodes if not found[barcode]]
+    }
+
+
 @api.route('/samples/<int:id>', methods=['GET'])
+@cached('samples')
 @json
 def get_sample(id):
     return Sample.query.get_or_404(id)
@@ -51,7 +127,16 @@ def update_sample(id):
     sample = Sample.query.get_or_404(id)
     sample.import_data(request.json)
     db.session.add(sample)
-    db.session.commit()
+    # the rollback below expires the sample
+    pmid = sample.pmid
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # the pmid was registered by a concurrent request after it was
+        # checked
+        db.session.rollback()
+        raise ValidationError('Invalid sample: duplicate pmid {0}'.format(
+            pmid))
     return {}
 
 
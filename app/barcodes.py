@@ -0,0 +1,49 @@
+from flask import current_app, request
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
+from .decorators.caching import LRUCache
+from .models import Sample
+from .signals import on_commit
+
+# exported samples by barcode, kept for the bursts of lookups of a bench
+# scanner
+barcode_cache = LRUCache(max_entries=10000)
+
+
+@on_commit
+def _invalidate(changes):
+    barcode_cache.invalidate(changes)
+
+
+def lookup_samples(barcodes):
+    """Return a dictionary that maps each barcode to the list of exported
+    samples with that pmid or ori_num.
+
+    Barcodes found in the cache are served from it, and the others are
+    resolved together with a single query. Barcodes that match no sample
+    are cached as well, until the samples table is written."""
+    found = {}
+    misses = []
+    for barcode in barcodes:
+        samples = barcode_cache.get((request.host_url, barcode))
+        if samples is None:
+            misses.append(barcode)
+        else:
+            found[barcode] = samples
+    if misses:
+        missing = set(misses)
+        for barcode in misses:
+            found[barcode] = []
+        query = Sample.query.options(
+            joinedload('batch'), joinedload('client'), joinedload('library')) \
+            .filter(or_(Sample.pmid.in_(misses), Sample.ori_num.in_(misses))) \
+            .order_by(Sample.id)
+        for sample in query:
+            data = sample.export_data()
+            for barcode in set([sample.pmid, sample.ori_num]) & missing:
+                found[barcode].append(data)
+        timeout = current_app.config.get('BARCODE_CACHE_TIMEOUT', 300)
+        for barcode in misses:
+            barcode_cache.set((request.host_url, barcode), found[barcode],
+                              timeout=timeout, tags=['samples'])
+    return found
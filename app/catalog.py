@@ -0,0 +1,142 @@
+import threading
+import time
+from sqlalchemy import orm
+from sqlalchemy.orm.attributes import set_committed_value
+from . import db
+from .signals import on_commit
+
+# tables that hold the reference data kept by the catalog
+tables = frozenset(['infos', 'categories', 'category_infos', 'refs'])
+
+
+class Catalog(object):
+    """In-memory copy of the static indicator tables (Info, Category,
+    CategoryInfo and Ref), indexed for the lookups the API needs.
+
+    The catalog is loaded once per process, on first use. Writes to any of
+    its tables bump the version counter, which causes a reload on the next
+    access. As other processes cannot see that counter, the catalog is also
+    reloaded after CATALOG_TIMEOUT seconds."""
+    def __init__(self, timeout=300):
+        self.timeout = timeout
+        self.version = 0
+        self._state = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.timeout = app.config.get('CATALOG_TIMEOUT', self.timeout)
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+
+    def _get_state(self):
+        state = self._state
+        if state is not None and state.version == self.version and \
+                time.time() - state.loaded_at < self.timeout:
+            return state
+        with self._lock:
+            state = self._state
+            if state is None or state.version != self.version or \
+                    time.time() - state.loaded_at >= self.timeout:
+                state = self._state = _CatalogState(self.version)
+            return state
+
+    def get_infos(self):
+        return self._get_state().infos
+
+    def get_info(self, id):
+        return self._get_state().infos_by_id.get(id)
+
+    def get_info_by_alias(self, alias):
+        return self._get_state().infos_by_alias.get(alias)
+
+    def get_categories(self):
+        return self._get_state().categories
+
+    def get_category(self, id):
+        return self._get_state().categories_by_id.get(id)
+
+    def get_category_infos(self, id):
+        return self._get_state().category_infos.get(id)
+
+    def get_info_categories(self, id):
+        return self._get_state().info_categories.get(id)
+
+    def get_refs(self):
+        return self._get_state().refs
+
+    def get_ref(self, id):
+        return self._get_state().refs_by_id.get(id)
+
+    def get_info_refs(self, id):
+        return self._get_state().info_refs.get(id)
+
+    def get_indicators(self):
+        """Return the interpretation.Indicators for the catalog's infos and
+        refs, built once per load."""
+        state = self._get_state()
+        if state.indicators is None:
+            from .interpretation import Indicators
+            state.indicators = Indicators(state.infos, state.refs)
+        return state.indicators
+
+
+class _CatalogState(object):
+    """The indexes of one load of the catalog. A new instance is built on
+    every reload and swapped in whole, so readers never see a mix of old
+    and new data."""
+    def __init__(self, version):
+        from .models import Info, Category, CategoryInfo, Ref
+        self.version = version
+        self.loaded_at = time.time()
+        self.indicators = None
+
+        # the objects are loaded in a private session and detached from it,
+        # so that they can be shared by all requests
+        session = orm.Session(bind=db.engine)
+        try:
+            infos = session.query(Info).order_by(Info.id).all()
+            categories = session.query(Category).order_by(Category.id).all()
+            links = session.query(CategoryInfo).order_by(CategoryInfo.id) \
+                .all()
+            refs = session.query(Ref).order_by(Ref.id).all()
+        finally:
+            session.close()
+
+        self.infos = infos
+        self.infos_by_id = dict((info.id, info) for info in infos)
+        self.infos_by_alias = {}
+        for info in infos:
+            if info.alias:
+                self.infos_by_alias.setdefault(info.alias, info)
+        self.categories = categories
+        self.categories_by_id = dict((category.id, category)
+                                     for category in categories)
+        self.category_infos = dict((category.id, [])
+                                   for category in categories)
+        self.info_categories = dict((info.id, []) for info in infos)
+        for link in links:
+            info = self.infos_by_id.get(link.info_id)
+            category = self.categories_by_id.get(link.category_id)
+            if info is not None and category is not None:
+                self.category_infos[category.id].append(info)
+                self.info_categories[info.id].append(category)
+        self.refs = refs
+        self.refs_by_id = dict((ref.id, ref) for ref in refs)
+        self.info_refs = dict((info.id, []) for info in infos)
+        for ref in refs:
+            # give each ref its info, so that export_data() does not need to
+            # load it from the database
+            set_committed_value(ref, 'info', self.infos_by_id.get(ref.info_id))
+            if ref.info_id in self.info_refs:
+                self.info_refs[ref.info_id].append(ref)
+
+
+catalog = Catalog()
+
+
+@on_commit
+def _invalidate(changes):
+    if not tables.isdisjoint(changes):
+        catalog.invalidate()
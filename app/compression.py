@@ -0,0 +1,90 @@
+import zlib
+from flask import request
+from werkzeug.wsgi import ClosingIterator
+
+# window bits of zlib.compressobj() for each content coding: gzip wraps the
+# deflate stream in a gzip header, and HTTP's deflate is the zlib format
+codings = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS
+}
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson',
+                          'text/csv', 'text/plain', 'text/html')
+
+
+class Compression(object):
+    """Compression of response bodies, negotiated with the Accept-Encoding
+    header of the request.
+
+    Bodies smaller than COMPRESSION_MIN_SIZE bytes are sent as they are.
+    Streamed responses are compressed as they are sent, and every chunk is
+    flushed so that the client receives the rows as they are produced.
+    Responses served from the response cache carry the compressed bodies of
+    their cache entry, so that each coding of a cached response is only
+    compressed once."""
+    def __init__(self):
+        self.level = 6
+        self.min_size = 1024
+        self.mimetypes = frozenset(COMPRESSIBLE_MIMETYPES)
+
+    def init_app(self, app):
+        if not app.config.get('COMPRESSION_ENABLED', True):
+            return
+        self.level = app.config.get('COMPRESSION_LEVEL', self.level)
+        self.min_size = app.config.get('COMPRESSION_MIN_SIZE', self.min_size)
+        self.mimetypes = frozenset(app.config.get('COMPRESSION_MIMETYPES',
+                                                  self.mimetypes))
+        app.after_request(self._compress)
+
+    def _compress(self, response):
+        if response.mimetype not in self.mimetypes or \
+                'Content-Encoding' in response.headers or \
+                response.direct_passthrough or \
+                response.status_code < 200 or \
+                response.status_code in (204, 206, 304):
+            return response
+        # the body depends on the Accept-Encoding header from here on, even
+        # when it is sent as it is
+        response.vary.add('Accept-Encoding')
+        coding = request.accept_encodings.best_match(['gzip', 'deflate'])
+        if coding is None:
+            return response
+
+        if response.is_streamed:
+            # closing the response closes the original body too, which
+            # releases the database cursor of streaming exports
+            original = response.response
+            response.response = ClosingIterator(
+                self._stream(response.iter_encoded(), coding),
+                getattr(original, 'close', None))
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            # encoded bodies of the cache entry the response was built from
+            bodies = getattr(response, 'encoded_bodies', None)
+            key = (coding, self.level)
+            body = bodies.get(key) if bodies is not None else None
+            if body is None:
+                compressor = zlib.compressobj(self.level, zlib.DEFLATED,
+                                              codings[coding])
+                body = compressor.compress(data) + compressor.flush()
+                if bodies is not None:
+                    bodies[key] = body
+            response.set_data(body)
+        response.headers['Content-Encoding'] = coding
+        return response
+
+    def _stream(self, chunks, coding):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED,
+                                      codings[coding])
+        for chunk in chunks:
+            if chunk:
+                yield compressor.compress(chunk) + \
+                    compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+
+compression = Compression()
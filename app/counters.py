@@ -0,0 +1,243 @@
+"""Counters of samples and results by status, kept for every batch and
+agency in the status_counts table.
+
+The counters are updated in the transaction that writes the samples and
+results. Writes made through the ORM are counted when the session is
+flushed; bulk inserts made with session.execute() must be counted with
+count_inserts(). Samples that are moved or deleted, and batches that move
+to another agency, have their batches counted again from the samples and
+results tables.
+"""
+from collections import Counter
+from sqlalchemy import and_, event, func, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from . import db
+from .models import Batch, Result, Sample, StatusCount
+from .signals import record_change
+
+# status stored for the rows that have none
+NO_STATUS = -1
+
+# largest number of ids sent in a single IN clause
+_CHUNK_SIZE = 500
+
+# attributes whose previous value is needed to move a count
+_tracked = {
+    Sample: ('batch_id', 'status'),
+    Result: ('sample_id', 'status'),
+    Batch: ('agency_id',)
+}
+
+
+def status_summary(scope, id):
+    """Return the number of samples and results of a batch or an agency,
+    given as the name of its table and its id, in total and by status."""
+    summary = dict((kind, {'total': 0, 'statuses': {}})
+                   for kind in ('samples', 'results'))
+    query = db.session.query(StatusCount.kind, StatusCount.status,
+                             StatusCount.count) \
+        .filter(StatusCount.scope == scope, StatusCount.scope_id == id)
+    for kind, status, count in query:
+        if count:
+            key = str(status) if status != NO_STATUS else 'null'
+            summary[kind]['statuses'][key] = count
+            summary[kind]['total'] += count
+    return summary
+
+
+def count_inserts(session, kind, rows):
+    """Count rows inserted without the ORM. kind is 'samples' or 'results',
+    and rows is an iterable of (batch_id, status) pairs, one for each
+    row."""
+    counts = Counter((batch_id, _status(status))
+                     for batch_id, status in rows if batch_id is not None)
+    agencies = _batch_agencies(session, set(batch_id
+                                            for batch_id, status in counts))
+    deltas = Counter()
+    for (batch_id, status), count in counts.items():
+        deltas['batches', batch_id, kind, status] += count
+        if agencies.get(batch_id) is not None:
+            deltas['agencies', agencies[batch_id], kind, status] += count
+    _apply(session, deltas)
+
+
+def _status(status):
+    return status if status is not None else NO_STATUS
+
+
+def _chunks(ids):
+    ids = sorted(ids)
+    for i in range(0, len(ids), _CHUNK_SIZE):
+        yield ids[i:i + _CHUNK_SIZE]
+
+
+def _batch_agencies(session, batch_ids):
+    agencies = {}
+    for chunk in _chunks(batch_ids):
+        agencies.update(session.query(Batch.id, Batch.agency_id)
+                        .filter(Batch.id.in_(chunk)))
+    return agencies
+
+
+def _sample_batches(session, sample_ids):
+    batches = {}
+    for chunk in _chunks(sample_ids):
+        batches.update(session.query(Sample.id, Sample.batch_id)
+                       .filter(Sample.id.in_(chunk)))
+    return batches
+
+
+def _apply(session, deltas):
+    """Add a Counter of (scope, scope_id, kind, status) keys to the
+    counters, with a single executemany upsert.
+
+    The counters are created and incremented by the same statement, so
+    that concurrent transactions that create the same counter do not
+    conflict, and are written in primary key order, so that transactions
+    that write the same counters lock them in the same order."""
+    deltas = sorted((key, count) for key, count in deltas.items()
+                    if count and key[1] is not None)
+    rows = [{'scope': key[0], 'scope_id': key[1], 'kind': key[2],
+             'status': key[3], 'count': count} for key, count in deltas]
+    if not rows:
+        return
+    connection = session.connection()
+    if connection.dialect.name == 'mysql':
+        upsert = 'ON DUPLICATE KEY UPDATE count = count + VALUES(count)'
+    else:
+        upsert = 'ON CONFLICT (scope, scope_id, kind, status) ' \
+            'DO UPDATE SET count = count + excluded.count'
+    connection.execute(text(
+        'INSERT INTO status_counts (scope, scope_id, kind, status, count) '
+        'VALUES (:scope, :scope_id, :kind, :status, :count) ' + upsert),
+        rows)
+    record_change(session, StatusCount.__tablename__, 'update')
+
+
+def _recount(session, batch_ids, old_agencies):
+    """Return the deltas that replace the counters of the given batches
+    with counts taken from the samples and results tables. old_agencies
+    maps the batches that changed agency to their previous one."""
+    deltas = Counter()
+    table = StatusCount.__table__
+    agencies = _batch_agencies(session, batch_ids)
+    for chunk in _chunks(batch_ids):
+        old = session.execute(
+            select([table.c.scope_id, table.c.kind, table.c.status,
+                    table.c.count])
+            .where(and_(table.c.scope == 'batches',
+                        table.c.scope_id.in_(chunk))))
+        for batch_id, kind, status, count in old:
+            deltas['batches', batch_id, kind, status] -= count
+            agency_id = old_agencies.get(batch_id, agencies.get(batch_id))
+            deltas['agencies', agency_id, kind, status] -= count
+        samples = session.query(Sample.batch_id, Sample.status,
+                                func.count(Sample.id)) \
+            .filter(Sample.batch_id.in_(chunk)) \
+            .group_by(Sample.batch_id, Sample.status)
+        results = session.query(Sample.batch_id, Result.status,
+                                func.count(Result.id)) \
+            .join(Result, Result.sample_id == Sample.id) \
+            .filter(Sample.batch_id.in_(chunk)) \
+            .group_by(Sample.batch_id, Result.status)
+        for kind, query in (('samples', samples), ('results', results)):
+            for batch_id, status, count in query:
+                status = _status(status)
+                deltas['batches', batch_id, kind, status] += count
+                deltas['agencies', agencies.get(batch_id), kind,
+                       status] += count
+    return deltas
+
+
+def _values(obj, name):
+    """Return the committed and the current value of an attribute."""
+    history = get_history(obj, name)
+    if history.deleted:
+        old = history.deleted[0]
+    elif history.unchanged:
+        old = history.unchanged[0]
+    else:
+        old = None
+    return old, getattr(obj, name)
+
+
+def _load_previous(target, value, oldvalue, initiator):
+    pass
+
+
+# with active history, the previous value of an attribute is loaded when it
+# is changed, so that its count can be moved
+for model, names in _tracked.items():
+    for name in names:
+        event.listen(getattr(model, name), 'set', _load_previous,
+                     active_history=True)
+
+
+@event.listens_for(Session, 'before_flush')
+def _load_deleted(session, flush_context, instances):
+    # the attributes of deleted objects cannot be loaded after the flush
+    for obj in session.deleted:
+        for name in _tracked.get(type(obj), ()):
+            getattr(obj, name)
+
+
+@event.listens_for(Session, 'after_flush')
+def _count_flush(session, flush_context):
+    changes = []
+    recount = set()
+    old_agencies = {}
+    for obj in session.new:
+        if isinstance(obj, Sample):
+            changes.append(('samples', obj.batch_id, obj.status, 1))
+        elif isinstance(obj, Result):
+            changes.append(('results', obj.sample_id, obj.status, 1))
+    for obj in session.deleted:
+        if isinstance(obj, Sample):
+            recount.add(_values(obj, 'batch_id')[0])
+        elif isinstance(obj, Result):
+            changes.append(('results', _values(obj, 'sample_id')[0],
+                            _values(obj, 'status')[0], -1))
+        elif isinstance(obj, Batch):
+            old_agencies[obj.id] = _values(obj, 'agency_id')[0]
+            recount.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Sample):
+            old_batch, batch_id = _values(obj, 'batch_id')
+            old_status, status = _values(obj, 'status')
+            if old_batch != batch_id:
+                recount.update([old_batch, batch_id])
+            elif old_status != status:
+                changes.append(('samples', batch_id, old_status, -1))
+                changes.append(('samples', batch_id, status, 1))
+        elif isinstance(obj, Result):
+            old_sample, sample_id = _values(obj, 'sample_id')
+            old_status, status = _values(obj, 'status')
+            if old_sample != sample_id or old_status != status:
+                changes.append(('results', old_sample, old_status, -1))
+                changes.append(('results', sample_id, status, 1))
+        elif isinstance(obj, Batch):
+            old_agency, agency_id = _values(obj, 'agency_id')
+            if old_agency != agency_id:
+                old_agencies[obj.id] = old_agency
+                recount.add(obj.id)
+    recount.discard(None)
+    if not changes and not recount:
+        return
+
+    # results are counted under the batch of their sample
+    batches = _sample_batches(session, set(
+        owner for kind, owner, status, delta in changes
+        if kind == 'results' and owner is not None))
+    counts = Counter()
+    for kind, owner, status, delta in changes:
+        batch_id = owner if kind == 'samples' else batches.get(owner)
+        if batch_id is not None and batch_id not in recount:
+            counts[batch_id, kind, _status(status)] += delta
+    agencies = _batch_agencies(session, set(key[0] for key in counts))
+    deltas = _recount(session, recount, old_agencies) if recount \
+        else Counter()
+    for (batch_id, kind, status), delta in counts.items():
+        deltas['batches', batch_id, kind, status] += delta
+        deltas['agencies', agencies.get(batch_id), kind, status] += delta
+    _apply(session, deltas)
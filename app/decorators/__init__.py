@@ -1,2 +1,3 @@
 from .json import json
-from .paginate import paginate
\ No newline at end of file
+from .paginate import paginate
+from .caching import cached
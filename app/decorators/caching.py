@@ -0,0 +1,131 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, request
+from ..signals import on_commit
+
+
+class LRUCache(object):
+    """A thread safe least-recently-used cache with a size limit and a
+    per-entry timeout.
+
+    Each entry can be tagged with the names of the tables it was built from,
+    so that it can be dropped when any of those tables are written. Entries
+    without tags are dropped on every write. The keys of the entries are
+    indexed by tag, so that invalidation only visits the entries it drops."""
+    def __init__(self, max_entries=500, timeout=60):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._tagged = {}
+        self._untagged = set()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('CACHE_MAX_ENTRIES',
+                                          self.max_entries)
+        self.timeout = app.config.get('CACHE_DEFAULT_TIMEOUT', self.timeout)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, tags, value = entry
+            if expires < time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None, tags=()):
+        if timeout is None:
+            timeout = self.timeout
+        tags = frozenset(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.time() + timeout, tags, value)
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(key)
+            if not tags:
+                self._untagged.add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, tables):
+        with self._lock:
+            stale = set(self._untagged)
+            for table in tables:
+                stale.update(self._tagged.get(table, ()))
+            for key in stale:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tagged.clear()
+            self._untagged.clear()
+
+    def _remove(self, key):
+        # must be called with the lock held
+        expires, tags, value = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tagged[tag]
+            keys.discard(key)
+            if not keys:
+                del self._tagged[tag]
+        self._untagged.discard(key)
+
+
+cache = LRUCache()
+
+
+@on_commit
+def _invalidate(changes):
+    cache.invalidate(changes)
+
+
+def cache_key():
+    """Return the cache key for the current request, built from the endpoint,
+    the view arguments and the query string."""
+    return (request.host_url, request.endpoint,
+            tuple(sorted((request.view_args or {}).items())),
+            tuple(sorted(request.args.items(multi=True))))
+
+
+def cached(*tables, timeout=None):
+    """Cache the response of a GET endpoint in memory.
+
+    The positional arguments are the names of the tables the response is
+    built from; a commit that writes to any of them drops the cached
+    response. This decorator must be placed above @json, so that the
+    complete response is cached."""
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapped(*args, **kwargs):
+            if request.method != 'GET' or \
+                    not current_app.config.get('CACHE_ENABLED', True):
+                return f(*args, **kwargs)
+
+            key = cache_key()
+            entry = cache.get(key)
+            if entry is None:
+                rv = f(*args, **kwargs)
+                if rv.status_code != 200 or rv.is_streamed:
+                    return rv
+                # the last item holds the compressed bodies of the response,
+                # added by the compression extension as they are requested
+                entry = (rv.get_data(), rv.status_code, list(rv.headers), {})
+                cache.set(key, entry, timeout=timeout, tags=tables)
+
+            # build a fresh response object, as the caller is free to modify
+            # the one it receives
+            data, status, headers, encoded_bodies = entry
+            rv = current_app.response_class(data, status=status,
+                                            headers=headers)
+            rv.encoded_bodies = encoded_bodies
+            return rv
+        return wrapped
+    return decorator
@@ -1,5 +1,7 @@
 import functools
-from flask import jsonify
+from flask import current_app
+from ..fields import requested_fields
+from ..serializers import jsonify
 
 
 def json(f):
@@ -10,6 +12,10 @@ def json(f):
         # invoke the wrapped function
         rv = f(*args, **kwargs)
 
+        # streaming responses are already complete
+        if isinstance(rv, current_app.response_class):
+            return rv
+
         # the wrapped function can return the dictionary alone,
         # or can also include a status code and/or headers.
         # here we separate all these items
@@ -21,9 +27,9 @@ def json(f):
             headers, status = status, None
 
         # if the response was a database model, then convert it to a
-        # dictionary
+        # dictionary with the fields given in the query string
         if not isinstance(rv, dict):
-            rv = rv.export_data()
+            rv = rv.export_data(fields=requested_fields())
 
         # generate the JSON response
         rv = jsonify(rv)
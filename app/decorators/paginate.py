@@ -1,12 +1,195 @@
+import base64
+import binascii
 import functools
-from flask import url_for, request
+import math
+from flask import abort, current_app, url_for, request
+from flask_sqlalchemy import Pagination
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import joinedload
+from sqlalchemy.sql.util import find_tables
+from ..exceptions import ValidationError
+from ..export import formats, stream_export
+from ..fields import load_fields, requested_fields
+from ..filters import filter_query
+from ..signals import on_commit
+from ..utils import primary_key
+from .caching import LRUCache
 
+# ways of computing the total number of items in a collection
+TOTALS = ('exact', 'cached', 'approximate', 'off')
 
-def paginate(collection, max_per_page=25):
+count_cache = LRUCache()
+
+# query string arguments that select a page, and are not carried over to the
+# links to other pages
+_page_args = ('page', 'per_page', 'expanded', 'cursor', 'count')
+
+
+@on_commit
+def _invalidate_counts(changes):
+    # updates do not change the number of rows in a table, but can move
+    # rows in or out of a filtered query, which is tagged with a
+    # ('filtered', table) pair for every table it reads
+    stale = [table for table, operations in changes.items()
+             if 'insert' in operations or 'delete' in operations]
+    stale.extend(('filtered', table) for table in changes)
+    count_cache.invalidate(stale)
+
+
+def encode_cursor(direction, key):
+    """Return an opaque token for a position in a keyset paginated
+    collection. The direction is '>' to fetch the items after key, or '<' to
+    fetch the items before it."""
+    token = '{0}{1}'.format(direction, key).encode('ascii')
+    return base64.urlsafe_b64encode(token).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Return the (direction, key) tuple stored in a cursor token. An empty
+    token represents the start of the collection."""
+    if not token:
+        return '>', None
+    try:
+        raw = base64.urlsafe_b64decode(
+            (token + '=' * (-len(token) % 4)).encode('ascii')).decode('ascii')
+        direction, key = raw[0], int(raw[1:])
+    except (binascii.Error, ValueError, IndexError):
+        raise ValidationError('Invalid cursor: ' + token)
+    if direction not in ('<', '>'):
+        raise ValidationError('Invalid cursor: ' + token)
+    return direction, key
+
+
+def keyset_paginate(query, token, per_page):
+    """Return a page of results ordered by primary key, starting at the
+    position encoded in token. This avoids the COUNT(*) and OFFSET that
+    regular pagination needs, so deep pages are as cheap as the first one.
+
+    The return value is a (items, prev_cursor, next_cursor) tuple."""
+    direction, key = decode_cursor(token)
+    pk = primary_key(query)
+    query = query.order_by(None)
+    if direction == '>':
+        if key is not None:
+            query = query.filter(pk > key)
+        items = query.order_by(pk).limit(per_page + 1).all()
+        has_prev, has_next = key is not None, len(items) > per_page
+        items = items[:per_page]
+    else:
+        items = query.filter(pk < key).order_by(pk.desc()) \
+            .limit(per_page + 1).all()
+        has_prev, has_next = len(items) > per_page, True
+        items = items[:per_page][::-1]
+
+    prev_cursor = next_cursor = None
+    if items:
+        if has_prev:
+            prev_cursor = encode_cursor('<', getattr(items[0], pk.key))
+        if has_next:
+            next_cursor = encode_cursor('>', getattr(items[-1], pk.key))
+    return items, prev_cursor, next_cursor
+
+
+def estimate_rows(query):
+    """Return the number of rows in the table of a query as estimated by
+    the database's statistics, or None if the estimate is not available."""
+    table = primary_key(query).table.name
+    connection = query.session.connection()
+    try:
+        if connection.dialect.name == 'mysql':
+            return connection.execute(text(
+                'SELECT table_rows FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = :table'),
+                table=table).scalar()
+        if connection.dialect.name == 'sqlite':
+            # only available after the database has been analyzed
+            stat = connection.execute(text(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = :table '
+                'AND idx IS NULL'), table=table).scalar()
+            if stat is not None:
+                return int(stat.split()[0])
+    except DBAPIError:
+        pass
+    return None
+
+
+def count_total(query, totals):
+    """Return the total number of items in a query, computed as indicated
+    by totals, which must be one of the values in TOTALS.
+
+    'exact' runs a COUNT(*), 'cached' does the same but keeps the result
+    until rows are inserted into or deleted from the table (or, for
+    filtered queries, any of the tables the query reads is written) or
+    COUNT_CACHE_TIMEOUT seconds pass, 'approximate' uses the table
+    statistics for unfiltered queries and behaves as 'cached' for filtered
+    ones, and 'off' returns None."""
+    if totals == 'off':
+        return None
+    if totals == 'approximate' and query.whereclause is None:
+        total = estimate_rows(query)
+        if total is not None:
+            return int(total)
+    if totals == 'exact':
+        return query.order_by(None).count()
+
+    key = (request.endpoint,
+           tuple(sorted((request.view_args or {}).items())),
+           tuple(sorted((name, value)
+                        for name, value in request.args.items(multi=True)
+                        if name not in _page_args + ('fields', 'sort'))))
+    total = count_cache.get(key)
+    if total is None:
+        total = query.order_by(None).count()
+        tags = [primary_key(query).table.name]
+        if query.whereclause is not None:
+            tags.extend(('filtered', getattr(table, 'element', table).name)
+                        for table in find_tables(query.statement,
+                                                 include_aliases=True))
+        count_cache.set(key, total,
+                        timeout=current_app.config.get('COUNT_CACHE_TIMEOUT',
+                                                       300),
+                        tags=tags)
+    return total
+
+
+def paginate(collection, max_per_page=25, cursor=False, eager=(),
+             stream=False, totals='exact'):
     """Generate a paginated response for a resource collection.
 
     Routes that use this decorator must return a SQLAlchemy query as a
-    response.
+    response. Routes that serve in-memory data can return a list instead.
+
+    When cursor is True the route also accepts a cursor argument in the
+    query string, which switches to keyset pagination by primary key. An
+    empty cursor requests the first page, and the response carries the
+    next_cursor and prev_cursor tokens for the adjacent pages. The total
+    number of items is only computed if count=1 is given.
+
+    When stream is True the route also accepts a format argument, either
+    'ndjson' or 'csv', which returns every item in the collection in a
+    single streaming response instead of a page.
+
+    The totals argument selects how the total number of items is obtained
+    in regular pagination (see count_total()). The PAGINATION_TOTALS
+    configuration dictionary can override it for a collection. With 'off'
+    the response has no total, pages or last_url.
+
+    The eager argument lists the relationships that the export_data() method
+    of the returned model uses. In expanded listings they are loaded with
+    the page itself, instead of issuing one query per item.
+
+    Collections of models that declare filter_fields or sort_fields can be
+    filtered and sorted with query string arguments (see filter_query()).
+    Custom sort orders are not available in cursor pagination.
+
+    Any collection can also be given an ids argument with a comma separated
+    list of ids, e.g. ?ids=1,5,9, to fetch those items with a single query
+    (see multi_get()).
+
+    Expanded listings and exports also accept a fields argument, with a
+    comma separated list of the fields to include in each item. Only the
+    columns these fields need are loaded from the database.
 
     The output of this decorator is a Python dictionary with the paginated
     results. The application must ensure that this result is converted to a
@@ -25,41 +208,173 @@ def paginate(collection, max_per_page=25):
             expanded = None
             if request.args.get('expanded', 0, type=int) != 0:
                 expanded = 1
+            export = stream and request.args.get('format') in formats
+            fields = requested_fields()
+            if not isinstance(query, list):
+                if cursor and 'cursor' in request.args and \
+                        request.args.get('sort'):
+                    raise ValidationError('Sorting is not supported with a '
+                                          'cursor')
+                query = filter_query(query)
+                if expanded or export or 'ids' in request.args:
+                    if eager:
+                        query = query.options(*[joinedload(name)
+                                                for name in eager])
+                    query = load_fields(query, fields)
 
-            # run the query with Flask-SQLAlchemy's pagination
-            p = query.paginate(page, per_page)
-
-            # build the pagination metadata to include in the response
-            pages = {'page': page, 'per_page': per_page,
-                     'total': p.total, 'pages': p.pages}
-            if p.has_prev:
-                pages['prev_url'] = url_for(request.endpoint, page=p.prev_num,
-                                            per_page=per_page,
-                                            expanded=expanded, _external=True,
-                                            **kwargs)
-            else:
-                pages['prev_url'] = None
-            if p.has_next:
-                pages['next_url'] = url_for(request.endpoint, page=p.next_num,
-                                            per_page=per_page,
-                                            expanded=expanded, _external=True,
-                                            **kwargs)
+            if 'ids' in request.args:
+                return multi_get(query, collection, fields)
+
+            # the links to other pages keep the rest of the query string,
+            # except for arguments named as a view argument, which would
+            # replace it in the URL
+            kwargs = dict(kwargs)
+            for name, value in request.args.items():
+                if name not in _page_args and \
+                        name not in (request.view_args or {}):
+                    kwargs[name] = value
+
+            if export:
+                return stream_export(query, collection,
+                                     request.args['format'], fields)
+            if cursor and 'cursor' in request.args:
+                items, pages = _cursor_page(query, per_page, expanded,
+                                            kwargs)
             else:
-                pages['next_url'] = None
-            pages['first_url'] = url_for(request.endpoint, page=1,
-                                         per_page=per_page, expanded=expanded,
-                                         _external=True, **kwargs)
-            pages['last_url'] = url_for(request.endpoint, page=p.pages,
-                                        per_page=per_page, expanded=expanded,
-                                        _external=True, **kwargs)
+                items, pages = _numbered_page(
+                    query, page, per_page, expanded, kwargs,
+                    current_app.config.get('PAGINATION_TOTALS', {}).get(
+                        collection, totals))
 
             # generate the paginated collection as a dictionary
             if expanded:
-                results = [item.export_data() for item in p.items]
+                results = [item.export_data(fields) for item in items]
             else:
-                results = [item.get_url() for item in p.items]
+                results = [item.get_url() for item in items]
 
             # return a dictionary as a response
             return {collection: results, 'pages': pages}
         return wrapped
     return decorator
+
+
+def parse_ids(value):
+    """Return the list of ids in a comma separated string, without
+    duplicates and in the order given. Empty items are ignored."""
+    max_ids = current_app.config.get('MULTIGET_MAX_IDS', 100)
+    ids = []
+    seen = set()
+    for id in value.split(','):
+        id = id.strip()
+        if not id:
+            continue
+        try:
+            id = int(id)
+        except ValueError:
+            raise ValidationError('Invalid id: ' + id)
+        if id not in seen:
+            if len(ids) == max_ids:
+                raise ValidationError('Too many ids: at most {0} are '
+                                      'allowed'.format(max_ids))
+            seen.add(id)
+            ids.append(id)
+    if not ids:
+        raise ValidationError('Invalid request: no ids given')
+    return ids
+
+
+def multi_get(query, collection, fields=None):
+    """Return the items of a query whose ids are given in the ids argument
+    of the query string, exported as in the detail routes and in the order
+    of the ids. The items are loaded with a single IN query, and the ids that
+    were not found are listed under 'missing'."""
+    ids = parse_ids(request.args['ids'])
+    if isinstance(query, list):
+        wanted = set(ids)
+        items = [item for item in query if item.id in wanted]
+    else:
+        items = query.filter(primary_key(query).in_(ids)).order_by(None).all()
+    items = dict((item.id, item) for item in items)
+    return {collection: [items[id].export_data(fields)
+                         for id in ids if id in items],
+            'missing': [id for id in ids if id not in items]}
+
+
+def _numbered_page(query, page, per_page, expanded, kwargs, totals):
+    if isinstance(query, list):
+        # paginate an in-memory list the same way Flask-SQLAlchemy
+        # paginates a query
+        items = query[(page - 1) * per_page:page * per_page]
+        if page < 1 or (not items and page != 1):
+            abort(404)
+        p = Pagination(None, page, per_page, len(query), items)
+        items, total, has_next = p.items, p.total, p.has_next
+    elif totals == 'exact':
+        # run the query with Flask-SQLAlchemy's pagination
+        p = query.paginate(page, per_page)
+        items, total, has_next = p.items, p.total, p.has_next
+    else:
+        # fetch one extra item to find out if there is a next page without
+        # counting all of them
+        if page < 1:
+            abort(404)
+        items = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+        if not items and page != 1:
+            abort(404)
+        has_next = len(items) > per_page
+        items = items[:per_page]
+        total = count_total(query, totals)
+
+    # build the pagination metadata to include in the response
+    pages = {'page': page, 'per_page': per_page}
+    if total is not None:
+        pages['total'] = total
+        pages['pages'] = int(math.ceil(total / float(per_page))) \
+            if per_page else 0
+    if page > 1:
+        pages['prev_url'] = url_for(request.endpoint, page=page - 1,
+                                    per_page=per_page,
+                                    expanded=expanded, _external=True,
+                                    **kwargs)
+    else:
+        pages['prev_url'] = None
+    if has_next:
+        pages['next_url'] = url_for(request.endpoint, page=page + 1,
+                                    per_page=per_page,
+                                    expanded=expanded, _external=True,
+                                    **kwargs)
+    else:
+        pages['next_url'] = None
+    pages['first_url'] = url_for(request.endpoint, page=1,
+                                 per_page=per_page, expanded=expanded,
+                                 _external=True, **kwargs)
+    if total is not None:
+        pages['last_url'] = url_for(request.endpoint, page=pages['pages'],
+                                    per_page=per_page, expanded=expanded,
+                                    _external=True, **kwargs)
+    return items, pages
+
+
+def _cursor_page(query, per_page, expanded, kwargs):
+    count = None
+    if request.args.get('count', 0, type=int) != 0:
+        count = 1
+    items, prev_cursor, next_cursor = keyset_paginate(
+        query, request.args.get('cursor'), per_page)
+
+    # build the pagination metadata to include in the response
+    pages = {'per_page': per_page, 'prev_cursor': prev_cursor,
+             'next_cursor': next_cursor}
+    if count:
+        pages['total'] = query.order_by(None).count()
+    for name, token in (('prev_url', prev_cursor), ('next_url', next_cursor)):
+        if token is not None:
+            pages[name] = url_for(request.endpoint, cursor=token,
+                                  per_page=per_page, expanded=expanded,
+                                  count=count, _external=True, **kwargs)
+        else:
+            pages[name] = None
+    pages['first_url'] = url_for(request.endpoint, cursor='',
+                                 per_page=per_page, expanded=expanded,
+                                 count=count, _external=True, **kwargs)
+    return items, pages
@@ -0,0 +1,57 @@
+from flask import current_app, stream_with_context
+from sqlalchemy.orm import joinedload
+from .models import Batch, Result, Sample
+from .serializers import dumps
+
+
+def batch_dossier(id):
+    """Return a streaming JSON response with a batch, the entities it refers
+    to, and all its samples with their clients, libraries and results, or
+    None if the batch does not exist.
+
+    The whole dossier is built with three queries: the batch with its
+    related entities, the samples with their clients and libraries, and the
+    results of all the samples. The results are read in chunks ordered by
+    sample and merged with the samples as the response is written, so only
+    the samples are held in memory."""
+    batch = Batch.query.options(
+        joinedload('agency'), joinedload('contact'), joinedload('position'),
+        joinedload('project'), joinedload('roadmap')).get(id)
+    if batch is None:
+        return None
+    samples = Sample.query.options(
+        joinedload('client'), joinedload('library')) \
+        .filter(Sample.batch_id == batch.id).order_by(Sample.id).all()
+    results = Result.query.join(Sample) \
+        .filter(Sample.batch_id == batch.id) \
+        .order_by(Result.sample_id, Result.id) \
+        .yield_per(current_app.config.get('EXPORT_CHUNK_SIZE', 1000))
+    return current_app.response_class(
+        stream_with_context(_dossier_chunks(batch, samples, results)),
+        mimetype='application/json')
+
+
+def _export(item):
+    return item.export_data() if item is not None else None
+
+
+def _dossier_chunks(batch, samples, results):
+    head = {'batch': batch.export_data()}
+    for name in ('agency', 'contact', 'position', 'project', 'roadmap'):
+        head[name] = _export(getattr(batch, name))
+    yield dumps(head)[:-1] + ', "samples": ['
+
+    results = iter(results)
+    result = next(results, None)
+    for index, sample in enumerate(samples):
+        data = sample.export_data()
+        data['client'] = _export(sample.client)
+        data['library'] = _export(sample.library)
+        data['results'] = []
+        # both lists are ordered by sample id, so the results of a sample
+        # come right after those of the previous one
+        while result is not None and result.sample_id == sample.id:
+            data['results'].append(result.export_data())
+            result = next(results, None)
+        yield (', ' if index else '') + dumps(data)
+    yield ']}\n'
@@ -0,0 +1,81 @@
+import csv
+import io
+from flask import current_app, stream_with_context
+from .serializers import RawJSON, dumps
+from .utils import primary_key
+
+formats = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+
+def stream_export(query, collection, format, fields=None):
+    """Return a streaming response with every item returned by a query,
+    exported as newline delimited JSON or as CSV.
+
+    The rows are read from the database in chunks with a server side
+    cursor and written out as they arrive, so the memory used does not
+    depend on the number of items exported. When fields is given only
+    those fields of each item are exported."""
+    if fields is not None:
+        # unknown fields must be reported before the response starts, so
+        # they are checked against the first item
+        first = query.order_by(None).first()
+        if first is not None:
+            first.export_data(fields)
+    chunk_size = current_app.config.get('EXPORT_CHUNK_SIZE', 1000)
+    query = query.order_by(None).order_by(primary_key(query)) \
+        .yield_per(chunk_size)
+    if format == 'csv':
+        rows = _csv_rows(query, chunk_size, fields)
+    else:
+        rows = _ndjson_rows(query, chunk_size, fields)
+    response = current_app.response_class(stream_with_context(rows),
+                                          mimetype=formats[format])
+    response.headers['Content-Disposition'] = \
+        'attachment; filename={0}.{1}'.format(collection, format)
+    return response
+
+
+def _ndjson_rows(query, chunk_size, fields):
+    lines = []
+    for item in query:
+        lines.append(dumps(item.export_data(fields)))
+        if len(lines) == chunk_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def _csv_rows(query, chunk_size, fields):
+    buffer = io.StringIO()
+    writer = None
+    count = 0
+    for item in query:
+        data = item.export_data(fields)
+        if writer is None:
+            # the columns are taken from the first item, as all the items in
+            # a collection export the same keys
+            writer = csv.DictWriter(buffer, fieldnames=sorted(data.keys()),
+                                    extrasaction='ignore')
+            writer.writeheader()
+        writer.writerow(dict((key, _csv_value(value))
+                             for key, value in data.items()))
+        count += 1
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _csv_value(value):
+    # nested structures such as Result.content are written as JSON
+    if isinstance(value, RawJSON):
+        return value.text
+    if isinstance(value, (dict, list)):
+        return dumps(value)
+    return value
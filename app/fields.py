@@ -0,0 +1,40 @@
+from flask import has_request_context, request
+from sqlalchemy.orm import defer
+from .exceptions import ValidationError
+
+
+def requested_fields():
+    """Return the set of fields given in the fields argument of the query
+    string, such as ?fields=pmid,status, or None if all the fields are
+    requested."""
+    if not has_request_context() or not request.args.get('fields'):
+        return None
+    return frozenset(name.strip() for name in request.args['fields'].split(',')
+                     if name.strip())
+
+
+def select_fields(data, fields):
+    """Return the items of an exported dictionary that are in fields. The
+    self_url item is always kept, so that clients can tell the items
+    apart."""
+    if fields is None:
+        return data
+    unknown = fields.difference(data)
+    if unknown:
+        raise ValidationError('Invalid fields: ' + ', '.join(sorted(unknown)))
+    return dict((key, value) for key, value in data.items()
+                if key in fields or key == 'self_url')
+
+
+def load_fields(query, fields):
+    """Defer the large columns of a query's model that are not needed to
+    export fields, so that they are neither fetched nor decoded.
+
+    These columns are listed in the large_fields attribute of the model,
+    and export_data() must only access them when they are requested."""
+    if fields is None:
+        return query
+    model = query.column_descriptions[0]['entity']
+    return query.options(*[defer(name)
+                           for name in getattr(model, 'large_fields', ())
+                           if name not in fields])
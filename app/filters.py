@@ -0,0 +1,82 @@
+import operator
+from datetime import datetime
+from dateutil import parser as datetime_parser
+from dateutil.tz import tzutc
+from flask import request
+from .exceptions import ValidationError
+from .utils import primary_key
+
+# comparisons that filters can use, by name
+operators = {
+    'eq': operator.eq,
+    'ge': operator.ge,
+    'le': operator.le
+}
+
+
+def parse_value(column, value):
+    """Convert a query string value to the Python type of a column."""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    try:
+        if python_type is datetime:
+            value = datetime_parser.parse(value)
+            if value.tzinfo is not None:
+                value = value.astimezone(tzutc()).replace(tzinfo=None)
+            return value
+        return python_type(value)
+    except (ValueError, OverflowError):
+        raise ValidationError('Invalid value for {0}: {1}'.format(
+            column.key, value))
+
+
+def filter_query(query):
+    """Apply the filters and the sort order given in the query string to a
+    query.
+
+    The filters the query's model accepts are declared in its filter_fields
+    dictionary, which maps each query string argument to a (column,
+    operator) tuple, with the operator being one of the keys of operators.
+    An 'eq' filter also accepts a comma separated list of values. The
+    columns that can be given in the sort argument, with an optional '-'
+    prefix for descending order, are listed in the sort_fields attribute.
+    The primary key is always added as the last sort key, so that pages are
+    stable.
+
+    Only the declared columns can be used, and they are expected to be
+    backed by indexes, so that every filter is an index range scan."""
+    model = query.column_descriptions[0]['entity']
+    filter_fields = getattr(model, 'filter_fields', {})
+    for name, (column, op) in filter_fields.items():
+        value = request.args.get(name)
+        if value is None or value == '':
+            continue
+        column = getattr(model, column)
+        if op == 'eq' and ',' in value:
+            query = query.filter(column.in_(
+                [parse_value(column, v) for v in value.split(',')]))
+        else:
+            query = query.filter(operators[op](column,
+                                               parse_value(column, value)))
+
+    # models can also accept arguments that are not plain column filters
+    if hasattr(model, 'apply_filters'):
+        query = model.apply_filters(query, request.args)
+
+    sort = request.args.get('sort')
+    if sort:
+        pk = primary_key(query)
+        names = sort.split(',')
+        order = []
+        for name in names:
+            key = name.lstrip('-')
+            if key not in getattr(model, 'sort_fields', (pk.key,)):
+                raise ValidationError('Invalid sort field: ' + key)
+            column = getattr(model, key)
+            order.append(column.desc() if name.startswith('-') else column)
+        if pk.key not in [name.lstrip('-') for name in names]:
+            order.append(pk.desc() if sort.startswith('-') else pk)
+        query = query.order_by(None).order_by(*order)
+    return query
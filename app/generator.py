@@ -0,0 +1,189 @@
+"""Generator of synthetic LIMS data for load and scaling tests.
+
+The whole graph is generated: agencies with their contacts and batches,
+samples with their clients and libraries, and results whose content holds
+values for the Info indicators. Rows are written with executemany inserts
+in large chunks, and a seeded random generator makes every run with the
+same arguments produce the same data.
+"""
+import datetime
+import random
+from sqlalchemy import func
+from . import db
+from .models import Agency, Batch, Category, CategoryInfo, Client, Contact, \
+    Info, Library, Position, Project, Ref, Result, Roadmap, Sample
+from .counters import count_inserts
+from .signals import record_change
+from .stats import results_written
+
+CHUNK_SIZE = 10000
+
+
+def parse_range(value):
+    """Parse a distribution given as 'n' or 'min-max' into a (min, max)
+    tuple."""
+    low, _, high = str(value).partition('-')
+    low = int(low)
+    high = int(high) if high else low
+    if low < 0 or high < low:
+        raise ValueError('Invalid range: {0}'.format(value))
+    return low, high
+
+
+class _Inserter(object):
+    """Buffers the rows of a table until flush() inserts them, assigning
+    ids after the largest one already in the table."""
+    def __init__(self, model):
+        self.model = model
+        self.next_id = (db.session.query(func.max(model.id)).scalar() or 0) \
+            + 1
+        self.rows = []
+        self.count = 0
+
+    def add(self, **row):
+        row['id'] = self.next_id
+        self.next_id += 1
+        self.rows.append(row)
+        return row['id']
+
+    def flush(self):
+        if self.rows:
+            db.session.execute(self.model.__table__.insert(), self.rows)
+            record_change(db.session, self.model.__tablename__, 'insert')
+            self.count += len(self.rows)
+            self.rows = []
+
+
+def generate_indicators(rnd, count, categories=5):
+    """Create count Info indicators, each with a reference range, a Ref for
+    every flag and a category. Returns the list of Info ids."""
+    infos = _Inserter(Info)
+    refs = _Inserter(Ref)
+    category_rows = _Inserter(Category)
+    links = _Inserter(CategoryInfo)
+    category_ids = [category_rows.add(name='Category {0}'.format(i))
+                    for i in range(categories)]
+    ids = []
+    for i in range(count):
+        low = round(rnd.uniform(0, 50), 2)
+        info_id = infos.add(c_name='指标 {0}'.format(i),
+                            e_name='Indicator {0}'.format(i),
+                            type='float', desc='', ref_min=low,
+                            ref_max=round(low + rnd.uniform(1, 50), 2),
+                            alias='ind{0}'.format(i))
+        ids.append(info_id)
+        for status in range(3):
+            refs.add(info_id=info_id, status=status, color=status, img=0,
+                     desc='')
+        links.add(category_id=rnd.choice(category_ids), info_id=info_id)
+    for inserter in (category_rows, infos, refs, links):
+        inserter.flush()
+    db.session.commit()
+    return ids
+
+
+def generate(samples, samples_per_batch='96', batches_per_agency='10-30',
+             results_per_sample='1', indicators_per_result='20-60',
+             indicators=100, seed=0, log=None):
+    """Generate samples samples and everything they depend on.
+
+    The distribution arguments are ranges given as 'n' or 'min-max', and
+    each value is drawn uniformly from its range. Info indicators are only
+    created if the table is empty. Returns a dictionary with the number of
+    rows inserted into each table."""
+    rnd = random.Random(seed)
+    samples_per_batch = parse_range(samples_per_batch)
+    batches_per_agency = parse_range(batches_per_agency)
+    results_per_sample = parse_range(results_per_sample)
+    indicators_per_result = parse_range(indicators_per_result)
+
+    info_ids = [id for (id,) in db.session.query(Info.id).order_by(Info.id)]
+    if not info_ids:
+        info_ids = generate_indicators(rnd, indicators)
+    indicators_per_result = (min(indicators_per_result[0], len(info_ids)),
+                             min(indicators_per_result[1], len(info_ids)))
+
+    # in dependency order, so that foreign keys are valid after each flush
+    order = (Position, Project, Roadmap, Agency, Contact, Library, Batch,
+             Client, Sample, Result)
+    tables = dict((model, _Inserter(model)) for model in order)
+
+    # (batch_id, status) of the buffered samples and results, for the
+    # status counters
+    counted = {'samples': [], 'results': []}
+
+    def flush():
+        for model in order:
+            tables[model].flush()
+        for kind, rows in counted.items():
+            count_inserts(db.session, kind, rows)
+            del rows[:]
+        results_written(db.session)
+        db.session.commit()
+        if log is not None:
+            log('{0} samples generated'.format(samples - remaining))
+
+    lookups = dict((model, [tables[model].add(
+        name='{0} {1}'.format(model.__name__, i)) for i in range(10)])
+        for model in (Position, Project, Roadmap))
+
+    start = datetime.datetime(2017, 1, 1)
+    remaining = samples
+    while remaining > 0:
+        agency_id = tables[Agency].add(
+            name='Agency {0}'.format(tables[Agency].next_id),
+            address='Address {0}'.format(tables[Agency].next_id))
+        contact_id = tables[Contact].add(
+            name='Contact {0}'.format(tables[Contact].next_id),
+            phone='{0:011d}'.format(rnd.randint(0, 10 ** 11 - 1)),
+            email='c{0}@example.org'.format(tables[Contact].next_id),
+            agency_id=agency_id)
+        for b in range(rnd.randint(*batches_per_agency)):
+            if remaining <= 0:
+                break
+            arrive = start + datetime.timedelta(
+                minutes=rnd.randint(0, 60 * 24 * 365 * 2))
+            batch_id = tables[Batch].add(
+                agency_id=agency_id, contact_id=contact_id,
+                deliver_time=arrive - datetime.timedelta(days=1),
+                arrive_time=arrive, store_time=arrive,
+                express_num=str(rnd.randint(10 ** 9, 10 ** 10)),
+                position_id=rnd.choice(lookups[Position]),
+                project_id=rnd.choice(lookups[Project]),
+                roadmap_id=rnd.choice(lookups[Roadmap]), remark='')
+            library_id = tables[Library].add(
+                name='Library {0}'.format(tables[Library].next_id))
+            for s in range(min(rnd.randint(*samples_per_batch), remaining)):
+                client_id = tables[Client].add(
+                    name='Client {0}'.format(tables[Client].next_id),
+                    gender=rnd.randint(0, 1), age=rnd.randint(1, 90),
+                    height=round(rnd.uniform(50, 200), 1),
+                    weight=round(rnd.uniform(3, 120), 1), extra={})
+                sample_id = tables[Sample].add(
+                    batch_id=batch_id, client_id=client_id,
+                    library_id=library_id,
+                    pmid='PM{0:010d}'.format(tables[Sample].next_id),
+                    ori_num='OR{0:010d}'.format(tables[Sample].next_id),
+                    type=rnd.randint(0, 3), status=rnd.randint(0, 3),
+                    sequence_method=rnd.randint(0, 2),
+                    primer=rnd.randint(0, 2), sequencer=rnd.randint(0, 2))
+                counted['samples'].append(
+                    (batch_id, tables[Sample].rows[-1]['status']))
+                for r in range(rnd.randint(*results_per_sample)):
+                    keys = rnd.sample(info_ids,
+                                      rnd.randint(*indicators_per_result))
+                    tables[Result].add(
+                        sample_id=sample_id, date=arrive,
+                        status=rnd.randint(0, 2), auditor='',
+                        content=dict((str(key),
+                                      round(rnd.uniform(0, 100), 3))
+                                     for key in keys))
+                    counted['results'].append(
+                        (batch_id, tables[Result].rows[-1]['status']))
+                remaining -= 1
+            if sum(len(tables[model].rows) for model in order) >= \
+                    CHUNK_SIZE:
+                flush()
+    flush()
+    return dict((model.__tablename__, inserter.count)
+                for model, inserter in tables.items())
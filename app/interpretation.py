@@ -0,0 +1,131 @@
+import json
+import numpy as np
+from .serializers import RawJSON
+from .urls import fast_url_for
+
+# flags assigned to each indicator of a result. The status of a Ref is the
+# flag it describes, so the matching Ref of an indicator is the one with the
+# same info_id and a status equal to its flag.
+MISSING = -1
+NORMAL = 0
+LOW = 1
+HIGH = 2
+flag_names = {NORMAL: 'normal', LOW: 'low', HIGH: 'high'}
+
+
+def result_content(result):
+    """Return the content of a result as a dictionary. Results loaded from
+    the database hold a RawJSON, but results built in memory can also hold
+    a dictionary or JSON text."""
+    content = result.content
+    if isinstance(content, RawJSON):
+        return content.data or {}
+    if isinstance(content, bytes):
+        content = content.decode('utf-8')
+    if isinstance(content, str):
+        content = json.loads(content)
+    return content or {}
+
+
+class Indicators(object):
+    """Reference ranges and Ref descriptions for all the indicators, laid
+    out as arrays indexed by column, so that whole result matrices can be
+    evaluated at once.
+
+    Result content can refer to an indicator by Info id, alias or English
+    name; all of them map to the same column."""
+    def __init__(self, infos, refs):
+        self.infos = sorted(infos, key=lambda info: info.id)
+        self.columns = {}
+        for column, info in enumerate(self.infos):
+            self.columns[str(info.id)] = column
+        for column, info in enumerate(self.infos):
+            for key in (info.alias, info.e_name):
+                if key:
+                    self.columns.setdefault(key, column)
+        self.ref_min = np.array(
+            [info.ref_min if info.ref_min is not None else -np.inf
+             for info in self.infos], dtype=float)
+        self.ref_max = np.array(
+            [info.ref_max if info.ref_max is not None else np.inf
+             for info in self.infos], dtype=float)
+
+        # ref_index[column, flag] is the position in self.refs of the Ref
+        # that describes that flag, or -1 if there is none
+        self.refs = list(refs)
+        self.ref_index = np.full((len(self.infos), len(flag_names)), -1,
+                                 dtype=int)
+        by_id = dict((info.id, column)
+                     for column, info in enumerate(self.infos))
+        for position, ref in enumerate(self.refs):
+            column = by_id.get(ref.info_id)
+            if column is not None and ref.status in flag_names:
+                self.ref_index[column, ref.status] = position
+
+    def matrix(self, results):
+        """Return a results x indicators matrix with the numeric value of
+        every indicator, or NaN where a result does not have it."""
+        values = np.full((len(results), len(self.infos)), np.nan)
+        for row, result in enumerate(results):
+            for key, value in result_content(result).items():
+                column = self.columns.get(str(key))
+                if column is None:
+                    continue
+                try:
+                    values[row, column] = float(value)
+                except (TypeError, ValueError):
+                    pass
+        return values
+
+    def evaluate(self, values):
+        """Flag every value of a matrix against the reference ranges.
+
+        Returns a (flags, refs) tuple of matrices with the shape of values,
+        holding the flag of each value and the position in self.refs of its
+        matching Ref (-1 if there is none)."""
+        present = ~np.isnan(values)
+        flags = np.where(present, NORMAL, MISSING)
+        with np.errstate(invalid='ignore'):
+            flags[values < self.ref_min] = LOW
+            flags[values > self.ref_max] = HIGH
+        columns = np.broadcast_to(np.arange(len(self.infos)), values.shape)
+        refs = np.where(present,
+                        self.ref_index[columns, np.maximum(flags, 0)], -1)
+        return flags, refs
+
+    def interpret(self, results):
+        """Return the interpretation of a list of results, evaluated in a
+        single pass."""
+        values = self.matrix(results)
+        flags, refs = self.evaluate(values)
+        return [self._export_row(result, values[row], flags[row], refs[row])
+                for row, result in enumerate(results)]
+
+    def _export_row(self, result, values, flags, refs):
+        indicators = []
+        for column in np.flatnonzero(flags != MISSING):
+            info = self.infos[column]
+            ref = self.refs[refs[column]] if refs[column] >= 0 else None
+            indicators.append({
+                'info_url': fast_url_for('api.get_info', id=info.id,
+                                         _external=True),
+                'alias': info.alias,
+                'value': float(values[column]),
+                'ref_min': info.ref_min,
+                'ref_max': info.ref_max,
+                'flag': flag_names[int(flags[column])],
+                'ref': {
+                    'self_url': ref.get_url(),
+                    'status': ref.status,
+                    'color': ref.color,
+                    'img': ref.img,
+                    'desc': ref.desc
+                } if ref is not None else None
+            })
+        return {
+            'result_url': result.get_url(),
+            'sample_url': fast_url_for('api.get_sample', id=result.sample_id,
+                                       _external=True)
+            if result.sample_id is not None else '',
+            'indicators': indicators
+        }
@@ -0,0 +1,140 @@
+import bisect
+import threading
+import time
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+
+
+class _EndpointStats(object):
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.latency = 0.0
+        self.statuses = {}
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.response_bytes = 0
+
+
+class Metrics(object):
+    """Per-endpoint request latency, SQL and response size statistics,
+    kept in memory and exported in the Prometheus text format.
+
+    SQL statements are timed with SQLAlchemy engine events and attributed
+    to the request that issued them. For streamed responses the latency
+    and size only cover the work done before the body is sent."""
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._end_request)
+
+    def _start_request(self):
+        g.metrics_start = time.time()
+        g.metrics_sql_count = 0
+        g.metrics_sql_time = 0.0
+
+    def _end_request(self, response):
+        start = g.get('metrics_start')
+        if start is None:
+            return response
+        latency = time.time() - start
+        endpoint = request.endpoint or 'unmatched'
+        size = 0 if response.is_streamed else \
+            response.calculate_content_length() or 0
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = _EndpointStats()
+            stats.buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+            stats.count += 1
+            stats.latency += latency
+            stats.statuses[response.status_code] = \
+                stats.statuses.get(response.status_code, 0) + 1
+            stats.sql_count += g.metrics_sql_count
+            stats.sql_time += g.metrics_sql_time
+            stats.response_bytes += size
+        return response
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def render(self):
+        """Return all the statistics in the Prometheus text format."""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = [
+                '# HELP api_requests_total Requests by endpoint and status.',
+                '# TYPE api_requests_total counter']
+            for endpoint, stats in endpoints:
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(
+                        'api_requests_total{{endpoint="{0}",status="{1}"}} '
+                        '{2}'.format(endpoint, status, count))
+
+            lines += [
+                '# HELP api_request_duration_seconds Request latency by '
+                'endpoint.',
+                '# TYPE api_request_duration_seconds histogram']
+            for endpoint, stats in endpoints:
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ('+Inf',),
+                                        stats.buckets):
+                    cumulative += count
+                    lines.append(
+                        'api_request_duration_seconds_bucket{{endpoint="{0}",'
+                        'le="{1}"}} {2}'.format(endpoint, bound, cumulative))
+                lines.append('api_request_duration_seconds_sum{{endpoint='
+                             '"{0}"}} {1:.6f}'.format(endpoint, stats.latency))
+                lines.append('api_request_duration_seconds_count{{endpoint='
+                             '"{0}"}} {1}'.format(endpoint, stats.count))
+
+            for name, attribute, help in (
+                    ('api_sql_queries_total', 'sql_count',
+                     'SQL statements executed by endpoint.'),
+                    ('api_sql_duration_seconds_total', 'sql_time',
+                     'Time spent in SQL statements by endpoint.'),
+                    ('api_response_bytes_total', 'response_bytes',
+                     'Size of the response bodies by endpoint.')):
+                lines += ['# HELP {0} {1}'.format(name, help),
+                          '# TYPE {0} counter'.format(name)]
+                for endpoint, stats in endpoints:
+                    lines.append('{0}{{endpoint="{1}"}} {2}'.format(
+                        name, endpoint, getattr(stats, attribute)))
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    conn.info.setdefault('metrics_start', []).append(time.time())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    start = conn.info['metrics_start'].pop()
+    if has_request_context() and 'metrics_start' in g:
+        g.metrics_sql_count += 1
+        g.metrics_sql_time += time.time() - start
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    starts = context.connection.info.get('metrics_start') \
+        if context.connection is not None else None
+    if starts:
+        starts.pop()
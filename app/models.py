@@ -1,11 +1,72 @@
-from flask import request, url_for
+from flask import request
 from datetime import datetime
 from dateutil import parser as datetime_parser
 from dateutil.tz import tzutc
+from sqlalchemy.orm import aliased
 from . import db
 from .exceptions import ValidationError
+from .fields import select_fields
+from .serializers import RawJSON
 from .utils import split_url
+from .urls import fast_url_for
 import json
+import math
+import re
+import zlib
+
+
+class SQLiteJSON(db.TypeDecorator):
+    """JSON stored as text, used in place of db.JSON on SQLite, which has no
+    native JSON type."""
+    impl = db.Text
+
+    def process_bind_param(self, value, dialect):
+        return json.dumps(value) if value is not None else None
+
+    def process_result_value(self, value, dialect):
+        return json.loads(value) if value is not None else None
+
+
+JSON = db.JSON().with_variant(SQLiteJSON(), 'sqlite')
+
+
+class CompressedJSON(db.TypeDecorator):
+    """JSON stored as zlib compressed text. Values are loaded as RawJSON,
+    so that they can be sent to clients without being decoded, and can be
+    assigned as RawJSON or as plain Python structures. Uncompressed JSON
+    text written by older versions is also accepted."""
+    impl = db.LargeBinary(16777215)
+
+    def __init__(self, level=6, *args, **kwargs):
+        super(CompressedJSON, self).__init__(*args, **kwargs)
+        self.level = level
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, RawJSON):
+            text = value.text
+        else:
+            text = json.dumps(value, sort_keys=True, separators=(',', ':'))
+        return zlib.compress(text.encode('utf-8'), self.level)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        value = bytes(value)
+        try:
+            value = zlib.decompress(value)
+        except zlib.error:
+            # uncompressed JSON text written by older versions, which can
+            # be any JSON value
+            pass
+        return RawJSON(value.decode('utf-8'))
+
+
+def _is_id(value):
+    # bool is a subclass of int, but not a valid id
+    return isinstance(value, int) and not isinstance(value, bool)
+
 
 # 合作单位表格
 class Agency(db.Model):
@@ -33,16 +94,16 @@ class Agency(db.Model):
         return self
 
     def get_url(self):
-        return url_for('api.get_agency', id=self.id)
+        return fast_url_for('api.get_agency', id=self.id)
 
-    def export_data(self):
-        return {
+    def export_data(self, fields=None):
+        return select_fields({
             'self_url': self.get_url(),
             'name': self.name,
             'address': self.address,
-            'batches_url': url_for('api.get_agency_batches', id=self.id),
-            'contacts_url': url_for('api.get_agency_contacts', id=self.id)
-        }
+            'batches_url': fast_url_for('api.get_agency_batches', id=self.id),
+            'contacts_url': fast_url_for('api.get_agency_contacts', id=self.id)
+        }, fields)
 
 # 批次
 class Batch(db.Model):
@@ -68,9 +129,23 @@ class Batch(db.Model):
         backref='batch',
         lazy='dynamic'
     )
+    contact = db.relationship('Contact')
+    position = db.relationship('Position')
+    project = db.relationship('Project')
+    roadmap = db.relationship('Roadmap')
+    # query string filters and sort keys of the collection routes, each
+    # backed by an index
+    filter_fields = {
+        'arrive_from': ('arrive_time', 'ge'),
+        'arrive_to': ('arrive_time', 'le')
+    }
+    sort_fields = ('id', 'arrive_time')
+    __table_args__ = (
+        db.Index('ix_batches_arrive_time', 'arrive_time'),
+    )
 
     def get_url(self):
-        return url_for('api.get_batch', id=self.id, _external=True)
+        return fast_url_for('api.get_batch', id=self.id, _external=True)
 
     def import_data(self, data):
         try:
@@ -98,22 +173,21 @@ class Batch(db.Model):
             self.roadmap = Roadmap.query.get(data['roadmap_id'])
         return self
 
-    def export_data(self):
-        return {
+    def export_data(self, fields=None):
+        return select_fields({
         'self_url': self.get_url(),
-        'name': self.name,
         'deliver_time': self.deliver_time,
         'arrive_time': self.arrive_time,
         'express_num': self.express_num,
-        'stock_time': self.stock_time,
+        'stock_time': self.store_time,
         'remark': self.remark,
-        'agency_url': self.agency.get_url(),
-        'contact_url': self.contact.get_url(),
-        'stock_position_url': self.stock_position.get_url,
-        'project': self.project.get_url,
-        'roadmap': self.roadmap.get_url,
-        'samples_url': url_for('api.get_batch_samples', id=self.id, _external=True)
-        }
+        'agency_url': self.agency.get_url() if self.agency is not None else '',
+        'contact_url': self.contact.get_url() if self.contact is not None else '',
+        'stock_position_url': self.position.get_url() if self.position is not None else '',
+        'project': self.project.get_url() if self.project is not None else '',
+        'roadmap': self.roadmap.get_url() if self.roadmap is not None else '',
+        'samples_url': fast_url_for('api.get_batch_samples', id=self.id, _external=True)
+        }, fields)
 
 # 样品表
 class Sample(db.Model):
@@ -121,8 +195,10 @@ class Sample(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     batch_id = db.Column(db.Integer, db.ForeignKey('batches.id'))
     client_id = db.Column(db.Integer, db.ForeignKey('clients.id'))
-    pmid = db.Column(db.String(20))
-    ori_num = db.Column(db.String(20))
+    # barcodes scanned at the bench; pmid is our own and unique, ori_num is
+    # the customer's
+    pmid = db.Column(db.String(20), unique=True, index=True)
+    ori_num = db.Column(db.String(20), index=True)
     # 样本类型
     type = db.Column(db.SmallInteger)
     # 样品状态
@@ -138,9 +214,21 @@ class Sample(db.Model):
         backref='sample',
         lazy='dynamic'
     )
+    library = db.relationship('Library')
+    # query string filters and sort keys of the collection routes, each
+    # backed by an index
+    filter_fields = {
+        'status': ('status', 'eq'),
+        'sequencer': ('sequencer', 'eq')
+    }
+    sort_fields = ('id',)
+    __table_args__ = (
+        db.Index('ix_samples_status_sequencer', 'status', 'sequencer'),
+        db.Index('ix_samples_sequencer', 'sequencer'),
+    )
 
     def get_url(self):
-        return url_for('api.get_sample', id=self.id, _external=True)
+        return fast_url_for('api.get_sample', id=self.id, _external=True)
 
     def import_data(self, data):
         try:
@@ -156,6 +244,14 @@ class Sample(db.Model):
             # self.library_id = data['library_id']
         except KeyError as e:
             raise ValidationError('Invalid sample: missing' + e.args[0])
+        with db.session.no_autoflush:
+            duplicate = db.session.query(Sample.id).filter(
+                Sample.pmid == self.pmid)
+            if self.id is not None:
+                duplicate = duplicate.filter(Sample.id != self.id)
+            if self.pmid is not None and duplicate.first() is not None:
+                raise ValidationError('Invalid sample: duplicate pmid ' +
+                                      self.pmid)
         if data['batch_id'] is not None:
             self.batch = Batch.query.get(data['batch_id'])
         if data['client_id'] is not None:
@@ -164,8 +260,81 @@ class Sample(db.Model):
             self.library = Library.query.get(data['library_id'])
         return self
 
-    def export_data(self):
-        return {
+    @staticmethod
+    def import_bulk(items, batch_id=None):
+        """Validate a list of sample dictionaries for a bulk insert.
+
+        The batches, clients and libraries the samples refer to, and the
+        uniqueness of their pmids, are checked with one query per table.
+        When batch_id is given it is used for all
+        the samples. Returns a (rows, errors) tuple, with the rows ready to be
+        passed to an executemany insert and a list of per-row errors."""
+        def referenced(model, key):
+            # values of other types are reported as errors below
+            ids = set(item.get(key) for item in items
+                      if isinstance(item, dict) and
+                      _is_id(item.get(key)))
+            if not ids:
+                return set()
+            return set(id for (id,) in db.session.query(model.id).filter(
+                model.id.in_(ids)))
+        if batch_id is not None:
+            batches = set(id for (id,) in db.session.query(Batch.id).filter(
+                Batch.id == batch_id))
+        else:
+            batches = referenced(Batch, 'batch_id')
+        clients = referenced(Client, 'client_id')
+        libraries = referenced(Library, 'library_id')
+        pmids = set(item.get('pmid') for item in items
+                    if isinstance(item, dict) and
+                    isinstance(item.get('pmid'), str))
+        taken = set(pmid for (pmid,) in db.session.query(Sample.pmid).filter(
+            Sample.pmid.in_(pmids))) if pmids else set()
+
+        rows = []
+        errors = []
+        for index, item in enumerate(items):
+            try:
+                if not isinstance(item, dict):
+                    raise ValidationError('Invalid sample: not an object')
+                row = {'batch_id': batch_id or item.get('batch_id'),
+                       'client_id': item.get('client_id'),
+                       'library_id': item.get('library_id')}
+                for key in ('pmid', 'ori_num', 'type', 'status',
+                            'sequence_method', 'primer', 'sequencer'):
+                    row[key] = item[key]
+                for key, known in (('batch_id', batches),
+                                   ('client_id', clients),
+                                   ('library_id', libraries)):
+                    if row[key] is not None and not _is_id(row[key]):
+                        raise ValidationError(
+                            'Invalid sample: {0} must be an integer'.format(
+                                key))
+                    if row[key] is not None and row[key] not in known:
+                        raise ValidationError(
+                            'Invalid sample: unknown {0} {1}'.format(
+                                key, row[key]))
+                if row['pmid'] is not None:
+                    if not isinstance(row['pmid'], str):
+                        raise ValidationError(
+                            'Invalid sample: pmid must be a string')
+                    if row['pmid'] in taken:
+                        raise ValidationError(
+                            'Invalid sample: duplicate pmid ' + row['pmid'])
+                    taken.add(row['pmid'])
+            except KeyError as e:
+                errors.append({'index': index,
+                               'message': 'Invalid sample: missing ' +
+                                          e.args[0]})
+            except ValidationError as e:
+                errors.append({'index': index, 'message': e.args[0]})
+            else:
+                rows.append(row)
+        return rows, errors
+
+    def export_data(self, fields=None):
+        return select_fields({
+        'self_url': self.get_url(),
         'batch': self.batch.get_url() if self.batch is not None else '',
         'client_id': self.client.get_url() if self.client is not None else '',
         'pmid': self.pmid,
@@ -176,7 +345,7 @@ class Sample(db.Model):
         'primer': self.primer,
         'sequencer': self.sequencer,
         'library_id': self.library.get_url() if self.library is not None else ''
-        }
+        }, fields)
 
 # 客户表
 class Client(db.Model):
@@ -188,14 +357,33 @@ class Client(db.Model):
     height = db.Column(db.Float)
     weight = db.Column(db.Float)
     # 额外信息,包括各项指标
-    extra = db.Column(db.JSON(), nullable=True)
+    extra = db.Column(JSON, nullable=True)
+    # columns that are only loaded when requested in sparse fieldsets
+    large_fields = ('extra',)
+    # query string filters and sort keys of the collection routes, each
+    # backed by an index
+    filter_fields = {
+        'gender': ('gender', 'eq'),
+        'age_from': ('age', 'ge'),
+        'age_to': ('age', 'le')
+    }
+    sort_fields = ('id', 'age')
+    __table_args__ = (
+        db.Index('ix_clients_gender_age', 'gender', 'age'),
+        db.Index('ix_clients_age', 'age'),
+    )
     samples = db.relationship(
         'Sample',
         backref='client',
         lazy='dynamic'
     )
+    # indexed copies of the promoted keys of extra
+    extra_values = db.relationship(
+        'ClientExtra',
+        cascade='all, delete-orphan'
+    )
     def get_url(self):
-        return url_for('api.get_client', id=self.id, _external=True)
+        return fast_url_for('api.get_client', id=self.id, _external=True)
 
     def import_data(self, data):
         try:
@@ -203,23 +391,188 @@ class Client(db.Model):
             self.gender = data['gender']
             self.age = data['age']
             self.height = data['height']
-            self.width = data['width']
+            self.weight = data['weight']
             self.extra = data['extra']
         except KeyError as e:
             raise ValidationError('Invalid client: missing ' + e.args[0])
+        self.sync_extra()
         return self
 
-    def export_data(self):
-        return {
+    def sync_extra(self):
+        """Copy the values of the promoted keys of extra to the indexed
+        client_extras table, where they can be filtered on."""
+        current = dict((value.key_id, value) for value in self.extra_values)
+        extra = self.extra if isinstance(self.extra, dict) else {}
+        for key in ExtraKey.query.all():
+            value = key.convert(extra.get(key.name))
+            if value is None:
+                if key.id in current:
+                    self.extra_values.remove(current[key.id])
+                continue
+            row = current.get(key.id)
+            if row is None:
+                row = ClientExtra(key_id=key.id)
+                self.extra_values.append(row)
+            row.set_value(key, value)
+
+    @staticmethod
+    def apply_filters(query, args):
+        """Filter a query by the promoted keys of extra, given as
+        extra.<key>=value, with a comma separated list of values also
+        accepted, or as extra.<key>.from=value and extra.<key>.to=value for
+        a range. Each filter is an index range scan on client_extras."""
+        filters = []
+        for name in args:
+            if name.startswith('extra.'):
+                key, _, op = name[len('extra.'):].partition('.')
+                if op not in ('', 'from', 'to'):
+                    raise ValidationError('Invalid filter: ' + name)
+                filters.append((name, key, op))
+        if not filters:
+            return query
+        keys = dict((key.name, key) for key in ExtraKey.query.filter(
+            ExtraKey.name.in_(set(key for name, key, op in filters))))
+        for name, key, op in filters:
+            if key not in keys:
+                raise ValidationError('Invalid filter: {0} is not a promoted '
+                                      'extra key'.format(key))
+            key = keys[key]
+            values = []
+            for value in args[name].split(',') if op == '' else [args[name]]:
+                value = key.convert(value)
+                if value is None:
+                    raise ValidationError('Invalid value for {0}: {1}'.format(
+                        name, args[name]))
+                values.append(value)
+            alias = aliased(ClientExtra)
+            column = getattr(alias, key.column)
+            query = query.join(alias, db.and_(alias.client_id == Client.id,
+                                              alias.key_id == key.id))
+            if op == 'from':
+                query = query.filter(column >= values[0])
+            elif op == 'to':
+                query = query.filter(column <= values[0])
+            else:
+                query = query.filter(column.in_(values))
+        return query
+
+    def export_data(self, fields=None):
+        data = {
             'self_url': self.get_url(),
-            'samples_url': url_for('api.get_client_samples', id=self.id, _external=True),
+            'samples_url': fast_url_for('api.get_client_samples', id=self.id, _external=True),
             'name': self.name,
             'gender': self.gender,
             'age': self.age,
             'height': self.height,
-            'weight': self.width,
-            'extra': self.extra
+            'weight': self.weight
         }
+        # extra can be large, so it is only loaded when requested
+        if fields is None or 'extra' in fields:
+            data['extra'] = self.extra
+        return select_fields(data, fields)
+
+# Client.extra 中可查询的键
+class ExtraKey(db.Model):
+    __tablename__ = 'extra_keys'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    name = db.Column(db.String(64), unique=True)
+    # 'number' or 'string'
+    type = db.Column(db.String(10))
+
+    types = ('number', 'string')
+
+    @property
+    def column(self):
+        """The ClientExtra column that holds the values of this key."""
+        return 'number' if self.type == 'number' else 'text'
+
+    def convert(self, value):
+        """Return a value of this key converted to its type, or None if
+        the value is missing or cannot be converted."""
+        if value is None or isinstance(value, (dict, list)):
+            return None
+        if self.type == 'number':
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                return None
+            # MySQL cannot store NaN or infinities
+            return value if math.isfinite(value) else None
+        value = str(value)
+        return value if len(value) <= 255 else None
+
+    def populate(self, chunk_size=1000):
+        """Copy the values of this key from the extra column of every
+        client, with chunked executemany inserts.
+
+        The clients are read in chunks ordered by id, each of them fetched
+        completely before its values are inserted, as drivers that stream
+        results cannot run another statement on the connection until the
+        stream is consumed."""
+        last_id = 0
+        while True:
+            clients = db.session.query(Client.id, Client.extra) \
+                .filter(Client.id > last_id, Client.extra.isnot(None)) \
+                .order_by(Client.id).limit(chunk_size).all()
+            if not clients:
+                break
+            last_id = clients[-1][0]
+            rows = []
+            for client_id, extra in clients:
+                value = self.convert(extra.get(self.name)) \
+                    if isinstance(extra, dict) else None
+                if value is not None:
+                    row = {'client_id': client_id, 'key_id': self.id,
+                           'number': None, 'text': None}
+                    row[self.column] = value
+                    rows.append(row)
+            if rows:
+                db.session.execute(ClientExtra.__table__.insert(), rows)
+
+    def get_url(self):
+        return fast_url_for('api.get_extra_key', name=self.name, _external=True)
+
+    def import_data(self, data):
+        try:
+            self.name = data['name']
+            self.type = data['type']
+        except KeyError as e:
+            raise ValidationError('Invalid extra key: missing ' + e.args[0])
+        # names are used in URLs and in the extra.<name> filters
+        if not isinstance(self.name, str) or \
+                not re.match(r'[A-Za-z0-9_-]+\Z', self.name):
+            raise ValidationError('Invalid extra key: the name can only '
+                                  'contain letters, digits, _ and -')
+        if self.type not in self.types:
+            raise ValidationError('Invalid extra key: type must be one of ' +
+                                  ', '.join(self.types))
+        return self
+
+    def export_data(self, fields=None):
+        return select_fields({
+            'self_url': self.get_url(),
+            'name': self.name,
+            'type': self.type
+        }, fields)
+
+
+# Client.extra 中可查询的键的值
+class ClientExtra(db.Model):
+    __tablename__ = 'client_extras'
+    client_id = db.Column(db.Integer, db.ForeignKey('clients.id'),
+                          primary_key=True)
+    key_id = db.Column(db.Integer, db.ForeignKey('extra_keys.id'),
+                       primary_key=True)
+    number = db.Column(db.Float, nullable=True)
+    text = db.Column(db.String(255), nullable=True)
+    __table_args__ = (
+        db.Index('ix_client_extras_key_number', 'key_id', 'number'),
+        db.Index('ix_client_extras_key_text', 'key_id', 'text'),
+    )
+
+    def set_value(self, key, value):
+        self.number = value if key.column == 'number' else None
+        self.text = value if key.column == 'text' else None
 
 # 结果表
 class Result(db.Model):
@@ -231,32 +584,130 @@ class Result(db.Model):
     status = db.Column(db.SmallInteger, default = 0)
     # 审核员: 按理说是角色为审核元的人
     auditor = db.Column(db.String(10))
-    content = db.Column(db.JSON)
+    # 指标结果, 以 Info id 为键
+    content = db.Column(CompressedJSON())
+    # columns that are only loaded when requested in sparse fieldsets
+    large_fields = ('content',)
+    # query string filters and sort keys of the collection routes, each
+    # backed by an index
+    filter_fields = {
+        'status': ('status', 'eq'),
+        'date_from': ('date', 'ge'),
+        'date_to': ('date', 'le')
+    }
+    sort_fields = ('id', 'date')
+    __table_args__ = (
+        db.Index('ix_results_status_date', 'status', 'date'),
+        db.Index('ix_results_date', 'date'),
+    )
 
     def get_url(self):
-        return url_for('api.get_result', id=self.id, _external=True)
+        return fast_url_for('api.get_result', id=self.id, _external=True)
 
-    def import_date(self, data):
+    def import_data(self, data):
         try:
-            self.date = datetime_parser.paste(data['date']).astimezone(tzutc()).replace(tzinfo=None)
+            self.date = datetime_parser.parse(data['date']).astimezone(tzutc()).replace(tzinfo=None)
             self.status = data['status']
             self.auditor = data['auditor']
-            self.content = data['content']
+            self.content = self.normalize_content(data['content'])
         except KeyError as e:
             raise ValidationError('Invalid result: missing' + e.args[0])
-        if data['sample_id'] is not None:
+        if data.get('sample_id') is not None:
             self.sample = Sample.query.get(data['sample_id'])
         return self
 
-    def export_data(self):
-        return {
+    @staticmethod
+    def normalize_content(content):
+        """Return the content of a result keyed by Info id. Indicators can
+        be given by id or by alias."""
+        from .catalog import catalog
+        if content is None:
+            return None
+        if not isinstance(content, dict):
+            raise ValidationError('Invalid result: content must be an object')
+        normalized = {}
+        for key, value in content.items():
+            info = catalog.get_info(int(key)) if str(key).isdecimal() else \
+                catalog.get_info_by_alias(key)
+            if info is None:
+                raise ValidationError('Invalid result: unknown indicator ' +
+                                      str(key))
+            normalized[str(info.id)] = value
+        return normalized
+
+    def export_data(self, fields=None):
+        data = {
             'self_url': self.get_url(),
-            'date': self.date.isoformate() + 'Z',
-            'sample_url': self.sample.get_url(),
+            'date': self.date.isoformat() + 'Z' if self.date is not None else None,
+            'sample_url': fast_url_for('api.get_sample', id=self.sample_id, _external=True),
             'status': self.status,
-            'auditor': self.auditor,
-            'content': json.loads(self.content)
+            'auditor': self.auditor
         }
+        # content can be large, so it is only loaded when requested
+        if fields is None or 'content' in fields:
+            data['content'] = self.content
+        return select_fields(data, fields)
+
+# 报告生成任务, 由 manage.py reports 启动的进程处理
+class ReportJob(db.Model):
+    __tablename__ = 'report_jobs'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    batch_id = db.Column(db.Integer, db.ForeignKey('batches.id'), index=True)
+    # 'queued', 'running', 'done' or 'failed'
+    status = db.Column(db.String(10), default='queued')
+    # root URL of the API, used for the links written in the report
+    base_url = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # start of the current attempt, a running job not finished within
+    # REPORT_JOB_TIMEOUT seconds is considered lost and claimed again
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    attempts = db.Column(db.SmallInteger, default=0)
+    # host and pid of the process that claimed the job
+    worker = db.Column(db.String(64))
+    error = db.Column(db.Text)
+    report = db.Column(CompressedJSON())
+    batch = db.relationship('Batch')
+    filter_fields = {
+        'status': ('status', 'eq')
+    }
+    statuses = ('queued', 'running', 'done', 'failed')
+    __table_args__ = (
+        db.Index('ix_report_jobs_status_started_at', 'status', 'started_at'),
+    )
+
+    def get_url(self):
+        return fast_url_for('api.get_report', id=self.id, _external=True)
+
+    def export_data(self, fields=None):
+        def timestamp(value):
+            return value.isoformat() + 'Z' if value is not None else None
+        return select_fields({
+            'self_url': self.get_url(),
+            'batch_url': fast_url_for('api.get_batch', id=self.batch_id,
+                                      _external=True),
+            'status': self.status,
+            'created_at': timestamp(self.created_at),
+            'started_at': timestamp(self.started_at),
+            'finished_at': timestamp(self.finished_at),
+            'attempts': self.attempts,
+            'error': self.error,
+            'download_url': fast_url_for('api.download_report', id=self.id,
+                                         _external=True)
+            if self.status == 'done' else None
+        }, fields)
+
+# 批次和合作单位的样品、结果状态计数, 由 counters 模块维护
+class StatusCount(db.Model):
+    __tablename__ = 'status_counts'
+    # 'batches' or 'agencies'
+    scope = db.Column(db.String(10), primary_key=True)
+    scope_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    # 'samples' or 'results'
+    kind = db.Column(db.String(10), primary_key=True)
+    # status of the counted rows, -1 for rows without one
+    status = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
 
 # 静态表,存储数据指标
 class Info(db.Model):
@@ -281,7 +732,7 @@ class Info(db.Model):
     )
 
     def get_url(self):
-        return url_for('api.get_info', id=self.id, _external=True)
+        return fast_url_for('api.get_info', id=self.id, _external=True)
 
     def import_data(self, data):
         self.c_name = data['c_name']
@@ -292,8 +743,8 @@ class Info(db.Model):
         self.ref_max = data['ref_max']
         self.alias = data['alias']
 
-    def export_data(self):
-        return {
+    def export_data(self, fields=None):
+        return select_fields({
         'self_url': self.get_url(),
         'c_name': self.c_name,
         'e_name': self.e_name,
@@ -302,9 +753,9 @@ class Info(db.Model):
         'ref_min': self.ref_min,
         'ref_max': self.ref_max,
         'alias': self.alias,
-        'refs': url_for('api.get_info_refs', id=self.id, _external=True),
-        'categories': url_for('api.get_info_categories', id=self.id, _external=True)
-        }
+        'refs': fast_url_for('api.get_info_refs', id=self.id, _external=True),
+        'categories': fast_url_for('api.get_info_categories', id=self.id, _external=True)
+        }, fields)
 
 class CategoryInfo(db.Model):
     __tablename__ = 'category_infos'
@@ -323,7 +774,7 @@ class Category(db.Model):
         back_populates='categories'
     )
     def get_url(self):
-        return url_for('api.get_category', id = self.id, _external=True)
+        return fast_url_for('api.get_category', id = self.id, _external=True)
 
     def import_data(self, data):
         try:
@@ -332,12 +783,12 @@ class Category(db.Model):
             raise ValidationError('Invalid Result: missing' + e.args[0])
         return self
 
-    def export_data(self):
-        return {
+    def export_data(self, fields=None):
+        return select_fields({
             'self_url': self.get_url(),
             'name': self.name,
-            'infos': url_for('api.get_category_infos', id=self.id, _external=True)
-        }
+            'infos': fast_url_for('api.get_category_infos', id=self.id, _external=True)
+        }, fields)
 # 结果参考表
 class Ref(db.Model):
     __tablename__ = 'refs'
@@ -349,7 +800,7 @@ class Ref(db.Model):
     desc = db.Column(db.Text)
 
     def get_url(self):
-        return url_for('api.get_library', id=self.id, _external=True)
+        return fast_url_for('api.get_ref', id=self.id, _external=True)
 
     def import_data(self, data):
         try:
@@ -363,68 +814,68 @@ class Ref(db.Model):
             self.info = Info.query.get(data['info_id'])
         return self
 
-    def export_data(self):
-        return {
+    def export_data(self, fields=None):
+        return select_fields({
             'self_url': self.get_url(),
             'status': self.status,
             'color': self.color,
             'img': self.img,
             'desc': self.desc,
             'info_url': self.info.get_url()
-        }
+        }, fields)
 
 # 项目表
 class Project(db.Model):
     __tablename__ = 'projects'
     id = db.Column(db.Integer(), primary_key=True, autoincrement=True)
-    name = db.Column(db.Integer, autoincrement=True, primary_key=True)
+    name = db.Column(db.String(64))
 
     def get_url(self):
-        return url_for('api.get_project', id=self.id, _external=True)
+        return fast_url_for('api.get_project', id=self.id, _external=True)
     def import_data(self, data):
         try:
             self.name = data['name']
         except KeyError as e:
             raise ValidationError('Invalid project: missing' + e.args[0])
         return self
-    def export_data(self):
-        return {
+    def export_data(self, fields=None):
+        return select_fields({
         'self_url': self.get_url(),
         'name': self.name
-        }
+        }, fields)
 
 # 技术路线
 class Roadmap(db.Model):
     __tablename__ = 'roadmaps'
     id = db.Column(db.Integer(), primary_key=True, autoincrement=True)
-    name = db.Column(db.Integer, autoincrement=True, primary_key=True)
+    name = db.Column(db.String(64))
 
     def get_url(self):
-        return url_for('api.get_roadmap', id=self.id, _external=True)
+        return fast_url_for('api.get_roadmap', id=self.id, _external=True)
     def import_data(self, data):
         try:
             self.name = data['name']
         except KeyError as e:
             raise ValidationError('Invalid roadmap: missing' + e.args[0])
         return self
-    def export_data(self):
-        return {
+    def export_data(self, fields=None):
+        return select_fields({
         'self_url': self.get_url(),
         'name': self.name
-        }
+        }, fields)
 
 
 # 联系人表
 class Contact(db.Model):
     __tablename__ = 'contacts'
     id = db.Column(db.Integer(), primary_key=True, autoincrement=True)
-    name = db.Column(db.Integer, autoincrement=True, primary_key=True)
+    name = db.Column(db.String(64))
     phone = db.Column(db.String(20), nullable=True)
     email = db.Column(db.String(20), nullable=True)
     agency_id = db.Column(db.Integer, db.ForeignKey('agencies.id'))
 
     def get_url(self):
-        return url_for('api.get_contact', id=self.id, _external=True)
+        return fast_url_for('api.get_contact', id=self.id, _external=True)
     def import_data(self, data):
         try:
             self.name = data['name']
@@ -435,51 +886,51 @@ class Contact(db.Model):
         if data['agency_id'] is not None:
             self.agency = Agency.query.get(data['agency_id'])
         return self
-    def export_data(self):
-        return {
+    def export_data(self, fields=None):
+        return select_fields({
         'self_url': self.get_url(),
         'name': self.name,
         'agency_url': self.agency.get_url()
-        }
+        }, fields)
 
 
 # 存储位置表
 class Position(db.Model):
     __tablename__ = 'positions'
     id = db.Column(db.Integer(), primary_key=True, autoincrement=True)
-    name = db.Column(db.Integer, autoincrement=True, primary_key=True)
+    name = db.Column(db.String(64))
 
     def get_url(self):
-        return url_for('api.get_position', id=self.id, _external=True)
+        return fast_url_for('api.get_position', id=self.id, _external=True)
     def import_data(self, data):
         try:
             self.name = data['name']
         except KeyError as e:
             raise ValidationError('Invalid position: missing' + e.args[0])
         return self
-    def export_data(self):
-        return {
+    def export_data(self, fields=None):
+        return select_fields({
         'self_url': self.get_url(),
         'name': self.name
-        }
+        }, fields)
 
 
 # DNA文库表
 class Library(db.Model):
     __tablename__ = 'libraries'
     id = db.Column(db.Integer(), primary_key=True, autoincrement=True)
-    name = db.Column(db.Integer, autoincrement=True, primary_key=True)
+    name = db.Column(db.String(64))
 
     def get_url(self):
-        return url_for('api.get_library', id=self.id, _external=True)
+        return fast_url_for('api.get_library', id=self.id, _external=True)
     def import_data(self, data):
         try:
             self.name = data['name']
         except KeyError as e:
             raise ValidationError('Invalid library: missing' + e.args[0])
         return self
-    def export_data(self):
-        return {
+    def export_data(self, fields=None):
+        return select_fields({
         'self_url': self.get_url(),
         'name': self.name
-        }
+        }, fields)
@@ -0,0 +1,263 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import traceback
+import numpy as np
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import defer, joinedload
+from . import db
+from .catalog import catalog
+from .interpretation import MISSING, flag_names
+from .models import ReportJob, Result, Sample
+from .serializers import RawJSON, dumps
+from .signals import record_change
+
+
+def render_batch_report(batch):
+    """Return the report of a batch: every sample with its client and its
+    results, each indicator of a result flagged against its reference
+    range, described by its Ref and grouped by Category.
+
+    The samples are loaded with one query, and the results are read in
+    chunks, each of them evaluated at once by the catalog's Indicators."""
+    indicators = catalog.get_indicators()
+    samples = Sample.query.options(joinedload('client')) \
+        .filter(Sample.batch_id == batch.id).order_by(Sample.id).all()
+    reports = {}
+    for sample in samples:
+        reports[sample.id] = {
+            'sample': sample.export_data(),
+            'client': sample.client.export_data()
+            if sample.client is not None else None,
+            'results': []
+        }
+
+    chunk_size = current_app.config.get('EXPORT_CHUNK_SIZE', 1000)
+    query = Result.query.join(Sample).filter(Sample.batch_id == batch.id) \
+        .order_by(Result.sample_id, Result.id).yield_per(chunk_size)
+    chunk = []
+    for result in query:
+        chunk.append(result)
+        if len(chunk) == chunk_size:
+            _render_results(indicators, chunk, reports)
+            chunk = []
+    if chunk:
+        _render_results(indicators, chunk, reports)
+
+    return {
+        'batch': batch.export_data(),
+        'generated_at': datetime.utcnow().isoformat() + 'Z',
+        'samples': [reports[sample.id] for sample in samples]
+    }
+
+
+def _render_results(indicators, results, reports):
+    values = indicators.matrix(results)
+    flags, refs = indicators.evaluate(values)
+    for row, result in enumerate(results):
+        groups = {}
+        for column in np.flatnonzero(flags[row] != MISSING):
+            info = indicators.infos[column]
+            ref = indicators.refs[refs[row, column]] \
+                if refs[row, column] >= 0 else None
+            indicator = {
+                'c_name': info.c_name,
+                'e_name': info.e_name,
+                'alias': info.alias,
+                'value': float(values[row, column]),
+                'ref_min': info.ref_min,
+                'ref_max': info.ref_max,
+                'flag': flag_names[int(flags[row, column])],
+                'color': ref.color if ref is not None else None,
+                'img': ref.img if ref is not None else None,
+                'desc': ref.desc if ref is not None else None
+            }
+            # indicators that belong to no category are listed together,
+            # after all the categories
+            for category in catalog.get_info_categories(info.id) or [None]:
+                groups.setdefault(category, []).append(indicator)
+        categories = [category for category in catalog.get_categories()
+                      if category in groups]
+        if None in groups:
+            categories.append(None)
+        data = result.export_data(fields=frozenset(['date', 'status',
+                                                    'auditor']))
+        data['categories'] = [{
+            'name': category.name if category is not None else None,
+            'indicators': groups[category]
+        } for category in categories]
+        if result.sample_id in reports:
+            reports[result.sample_id]['results'].append(data)
+
+
+def submit_report(batch):
+    """Queue the generation of the report of a batch, and return its job.
+
+    A job that is still queued for the batch is returned instead of a new
+    one, as it has not read any data yet. The links in the report point to
+    REPORT_BASE_URL, not to the host named in the request, which the client
+    controls."""
+    job = ReportJob.query.options(defer('report')) \
+        .filter(ReportJob.batch_id == batch.id,
+                ReportJob.status == 'queued').first()
+    if job is None:
+        job = ReportJob(batch=batch, status='queued', attempts=0,
+                        base_url=current_app.config['REPORT_BASE_URL'])
+        db.session.add(job)
+        db.session.commit()
+    return job
+
+
+def claim_jobs(limit, worker):
+    """Mark up to limit jobs as running in the name of worker, and return
+    their ids.
+
+    Queued jobs are claimed in order of submission, along with running jobs
+    that were started more than REPORT_JOB_TIMEOUT seconds ago, as their
+    worker is assumed to be lost. Each job is claimed with a conditional
+    update, so that the workers of several hosts can share the table. Lost
+    jobs that already used REPORT_MAX_ATTEMPTS attempts are failed instead."""
+    config = current_app.config
+    timeout = config.get('REPORT_JOB_TIMEOUT', 600)
+    max_attempts = config.get('REPORT_MAX_ATTEMPTS', 3)
+    now = datetime.utcnow()
+    table = ReportJob.__table__
+    candidates = db.session.query(
+        ReportJob.id, ReportJob.status, ReportJob.attempts) \
+        .filter(or_(ReportJob.status == 'queued',
+                    and_(ReportJob.status == 'running',
+                         ReportJob.started_at <
+                         now - timedelta(seconds=timeout)))) \
+        .order_by(ReportJob.id).limit(limit).all()
+    claimed = []
+    for id, status, attempts in candidates:
+        # every claim counts an attempt, so the status and attempts of a
+        # job tell whether it was changed since it was read
+        unchanged = and_(table.c.id == id, table.c.status == status,
+                         table.c.attempts == attempts)
+        if status == 'running' and attempts >= max_attempts:
+            db.session.execute(table.update().where(unchanged).values(
+                status='failed', finished_at=now,
+                error='worker lost after {0} attempts'.format(attempts)))
+            continue
+        rows = db.session.execute(table.update().where(unchanged).values(
+            status='running', started_at=now, finished_at=None,
+            worker=worker, attempts=table.c.attempts + 1))
+        if rows.rowcount == 1:
+            claimed.append(id)
+    if candidates:
+        record_change(db.session, 'report_jobs', 'update')
+    db.session.commit()
+    return claimed
+
+
+def run_job(id, worker):
+    """Render the report of a job claimed by worker, and store it. Returns
+    the final status of the job, or None if it was claimed by another
+    worker in the meantime.
+
+    Failed jobs are queued again until they use REPORT_MAX_ATTEMPTS
+    attempts."""
+    job = ReportJob.query.options(defer('report')).get(id)
+    if job is None or job.status != 'running' or job.worker != worker:
+        return None
+    table = ReportJob.__table__
+    mine = and_(table.c.id == id, table.c.status == 'running',
+                table.c.worker == worker, table.c.attempts == job.attempts)
+    # the links in the report point to the host the job was submitted to
+    context = current_app.test_request_context(base_url=job.base_url)
+    context.push()
+    try:
+        report = RawJSON(dumps(render_batch_report(job.batch)))
+        values = {'status': 'done', 'report': report, 'error': None}
+    except Exception:
+        db.session.rollback()
+        max_attempts = current_app.config.get('REPORT_MAX_ATTEMPTS', 3)
+        values = {
+            'status': 'failed' if job.attempts >= max_attempts else 'queued',
+            'error': traceback.format_exc().strip().splitlines()[-1]
+        }
+    finally:
+        context.pop()
+    values['finished_at'] = datetime.utcnow()
+    rows = db.session.execute(table.update().where(mine).values(**values))
+    record_change(db.session, 'report_jobs', 'update')
+    db.session.commit()
+    return values['status'] if rows.rowcount == 1 else None
+
+
+# application of each pool process, created by _init_process()
+_app = None
+
+
+def _init_process(config_name):
+    global _app
+    from . import create_app
+    # interruptions are handled by the parent, which terminates the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _app = create_app(config_name)
+    # jobs run in a test request context, but must read what was committed
+    _app.config['SQLALCHEMY_USE_REPLICAS'] = False
+    _app.app_context().push()
+
+
+def _run_job(id, worker):
+    try:
+        return run_job(id, worker)
+    finally:
+        db.session.remove()
+
+
+def run_workers(config_name, processes=None, poll_interval=2, once=False,
+                log=None):
+    """Process report jobs with a pool of worker processes, one job per
+    process at a time, until interrupted, or until no job is left if once
+    is True.
+
+    The pool is created before the database is used, and each process runs
+    its own application, so that no connection is shared across a fork.
+    Jobs are claimed by this process, and handed to the pool as processes
+    become free. As the state of every job is kept in the database, a job
+    left running by a worker that was stopped is claimed again once
+    REPORT_JOB_TIMEOUT expires. A job whose process does not return by then
+    (because the process died) is dropped from the pending ones, so that
+    its slot is used again; the pool replaces the dead process."""
+    processes = processes or multiprocessing.cpu_count()
+    timeout = current_app.config.get('REPORT_JOB_TIMEOUT', 600)
+    pool = multiprocessing.Pool(processes, initializer=_init_process,
+                                initargs=(config_name,))
+    worker = '{0}:{1}'.format(socket.gethostname(), os.getpid())
+    pending = {}
+    try:
+        while True:
+            for id, (async_result, deadline) in list(pending.items()):
+                if async_result.ready():
+                    del pending[id]
+                    status = async_result.get()
+                    if log is not None:
+                        log('report job {0}: {1}'.format(
+                            id, status or 'claimed by another worker'))
+                elif time.time() > deadline:
+                    del pending[id]
+                    if log is not None:
+                        log('report job {0}: no answer from its process '
+                            'after {1} seconds'.format(id, timeout))
+            claimed = []
+            if len(pending) < processes:
+                claimed = claim_jobs(processes - len(pending), worker)
+                db.session.remove()
+            for id in claimed:
+                pending[id] = (pool.apply_async(_run_job, (id, worker)),
+                               time.time() + timeout)
+            if once and not pending and not claimed:
+                break
+            if not claimed:
+                time.sleep(poll_interval if not pending
+                           else min(poll_interval, 0.1))
+    finally:
+        pool.terminate()
+        pool.join()
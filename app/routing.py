@@ -0,0 +1,103 @@
+import random
+import time
+from flask import has_request_context, request
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import create_engine, event, orm
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.sql.expression import UpdateBase
+
+# pool settings of the configuration, as (configuration key,
+# create_engine() argument) pairs
+_pool_options = (
+    ('SQLALCHEMY_POOL_SIZE', 'pool_size'),
+    ('SQLALCHEMY_POOL_TIMEOUT', 'pool_timeout'),
+    ('SQLALCHEMY_POOL_RECYCLE', 'pool_recycle'),
+    ('SQLALCHEMY_MAX_OVERFLOW', 'max_overflow')
+)
+
+
+# time of the last commit made by this process that wrote anything
+_last_write = 0.0
+
+
+class RoutingSession(SignallingSession):
+    """Session that sends the queries of GET and HEAD requests to a read
+    replica, when replicas are configured.
+
+    Once the session writes anything, by flushing or by executing an
+    INSERT, UPDATE or DELETE statement, all its queries go to the primary
+    database until the end of the request, so that the request reads its
+    own writes.
+
+    A commit that writes anything also clears the in-process caches, which
+    the next requests fill again. For SQLALCHEMY_REPLICA_LAG seconds after
+    such a commit every request reads from the primary, so that the caches
+    are not filled with data from a replica that has not received the
+    commit yet.
+
+    A session reads from a single replica, chosen on its first query, so
+    that the queries of a request (such as the count and the items of a
+    page) see the same data. Applications that set SQLALCHEMY_USE_REPLICAS
+    to False, such as the command line tools and the report workers, which
+    run their work in test request contexts, always use the primary."""
+    def get_bind(self, mapper=None, clause=None):
+        if isinstance(clause, UpdateBase):
+            self.info['wrote'] = True
+        if not self._flushing and not self.info.get('wrote') and \
+                has_request_context() and \
+                request.method in ('GET', 'HEAD') and \
+                self.app.config.get('SQLALCHEMY_USE_REPLICAS', True) and \
+                time.time() - _last_write >= \
+                self.app.config.get('SQLALCHEMY_REPLICA_LAG', 5):
+            replicas = self.app.extensions.get('sqlalchemy_replicas')
+            if replicas:
+                if 'replica' not in self.info:
+                    self.info['replica'] = random.choice(replicas)
+                return self.info['replica']
+        return super(RoutingSession, self).get_bind(mapper, clause)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _record_write(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _record_commit(session):
+    global _last_write
+    if session.info.get('wrote'):
+        _last_write = time.time()
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """Flask-SQLAlchemy extension that adds read replicas, given as a list
+    of URIs in the SQLALCHEMY_REPLICA_URIS configuration variable. The
+    replicas are configured as the primary database."""
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def init_app(self, app):
+        super(RoutingSQLAlchemy, self).init_app(app)
+        app.extensions['sqlalchemy_replicas'] = [
+            self.create_replica_engine(app, uri)
+            for uri in app.config.get('SQLALCHEMY_REPLICA_URIS') or ()]
+
+    def create_replica_engine(self, app, uri):
+        """Create the engine of a replica with the options Flask-SQLAlchemy
+        gives the primary, such as the character set and the pool recycle
+        time of MySQL."""
+        info = make_url(uri)
+        options = {'convert_unicode': True}
+        self.apply_pool_defaults(app, options)
+        self.apply_driver_hacks(app, info, options)
+        if app.config['SQLALCHEMY_ECHO']:
+            options['echo'] = True
+        return create_engine(info, **options)
+
+    def apply_driver_hacks(self, app, info, options):
+        if info.drivername.startswith('sqlite'):
+            # SQLite does not use a connection queue, so the pool settings
+            # of the configuration do not apply to it
+            for key, argument in _pool_options:
+                options.pop(argument, None)
+        super(RoutingSQLAlchemy, self).apply_driver_hacks(app, info, options)
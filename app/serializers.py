@@ -0,0 +1,273 @@
+import json as _json
+import re
+import uuid
+from datetime import date
+from json.encoder import encode_basestring, encode_basestring_ascii
+from flask import current_app, json, request
+from werkzeug.http import http_date
+
+# largest number of dictionary layouts kept by an Encoder. Exported models
+# only use a few each, but nested structures such as Client.extra can have
+# any keys.
+MAX_TEMPLATES = 1000
+
+# placeholder written in place of each RawJSON value by the unindented
+# encoder, and replaced with its text once the rest of the document is
+# encoded
+_marker = '__raw_json_{0}_'.format(uuid.uuid4().hex)
+_marker_re = re.compile('"{0}(\\d+)"'.format(_marker))
+
+
+class RawJSON(object):
+    """A JSON document kept in its encoded form.
+
+    Values of this type are written to responses as they are, without being
+    decoded and encoded again. The decoded document is available in the
+    data attribute, and is only built when it is accessed. It must be
+    treated as read only, as changes to it are not written back."""
+    __slots__ = ('text', '_data')
+
+    def __init__(self, text):
+        self.text = text
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = json.loads(self.text)
+        return self._data
+
+    def __eq__(self, other):
+        if isinstance(other, RawJSON):
+            return self.text == other.text
+        return self.data == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'RawJSON({0!r})'.format(self.text)
+
+
+class Encoder(object):
+    """JSON encoder that produces the same text as json.dumps() with the
+    same indent, separators, sort_keys and ensure_ascii arguments, and with
+    Flask's JSONEncoder as the fallback for other types. Dates are formatted
+    as Flask does, and RawJSON values are written as they are.
+
+    With indentation the json module uses its pure Python encoder, so this
+    class does the work instead. Exported models are dictionaries with the
+    same keys for every item, so the fixed parts of their encoding (the keys
+    in output order, with the separators and indentation between them) are
+    compiled once for each set of keys and nesting level, and only the
+    values are encoded for each item. The output is appended to a list of
+    strings, which is joined once at the end.
+
+    Without indentation the json module's C encoder is faster than any
+    Python code, and is used directly."""
+    def __init__(self, indent=None, separators=None, sort_keys=True,
+                 ensure_ascii=True):
+        if separators is None:
+            separators = (', ', ': ') if indent is None else (',', ': ')
+        self.indent = indent
+        self.separators = separators
+        self.item_separator, self.key_separator = separators
+        self.sort_keys = sort_keys
+        self.ensure_ascii = ensure_ascii
+        self.encode_string = encode_basestring_ascii if ensure_ascii \
+            else encode_basestring
+        self._templates = {}
+        # encoders of the scalar types, looked up by exact type before
+        # going through write()
+        self._scalars = {
+            str: self.encode_string,
+            int: int.__repr__,
+            float: _float,
+            bool: lambda value: 'true' if value else 'false',
+            type(None): lambda value: 'null',
+            RawJSON: lambda value: value.text
+        }
+
+    def encode(self, obj):
+        if self.indent is None:
+            return self._encode_flat(obj)
+        out = []
+        self.write(obj, out)
+        return ''.join(out)
+
+    def _encode_flat(self, obj):
+        fragments = []
+
+        def default(o):
+            if isinstance(o, RawJSON):
+                fragments.append(o.text)
+                return '{0}{1}'.format(_marker, len(fragments) - 1)
+            if isinstance(o, date):
+                return http_date(o.timetuple())
+            return current_app.json_encoder().default(o)
+
+        text = _json.JSONEncoder(
+            ensure_ascii=self.ensure_ascii, sort_keys=self.sort_keys,
+            separators=self.separators, default=default).encode(obj)
+        if fragments:
+            text = _marker_re.sub(lambda m: fragments[int(m.group(1))], text)
+        return text
+
+    def write(self, obj, out, level=0):
+        """Append the encoding of obj to the list out. level is the nesting
+        level of obj, used for indentation."""
+        if isinstance(obj, str):
+            out.append(self.encode_string(obj))
+        elif obj is None:
+            out.append('null')
+        elif obj is True:
+            out.append('true')
+        elif obj is False:
+            out.append('false')
+        elif isinstance(obj, int):
+            out.append(int.__repr__(obj))
+        elif isinstance(obj, float):
+            out.append(_float(obj))
+        elif isinstance(obj, dict):
+            self._write_dict(obj, out, level)
+        elif isinstance(obj, (list, tuple)):
+            self._write_list(obj, out, level)
+        elif isinstance(obj, RawJSON):
+            out.append(obj.text)
+        elif isinstance(obj, date):
+            out.append(self.encode_string(http_date(obj.timetuple())))
+        else:
+            self.write(current_app.json_encoder().default(obj), out, level)
+
+    def _newline(self, level):
+        if self.indent is None:
+            return ''
+        return '\n' + ' ' * (self.indent * level) \
+            if isinstance(self.indent, int) else '\n' + self.indent * level
+
+    def _template(self, keys, level):
+        """Return the keys of a dictionary in output order, and the strings
+        that go before each value and after the last one."""
+        template = self._templates.get((keys, level))
+        if template is None:
+            ordered = sorted(keys) if self.sort_keys else keys
+            inner = self._newline(level + 1)
+            separator = self.item_separator + inner
+            parts = []
+            for i, key in enumerate(ordered):
+                parts.append(('{' + inner if i == 0 else separator) +
+                             self.encode_string(key) + self.key_separator)
+            parts.append(self._newline(level) + '}')
+            if len(self._templates) >= MAX_TEMPLATES:
+                self._templates.clear()
+            template = self._templates[(keys, level)] = (tuple(ordered),
+                                                         tuple(parts))
+        return template
+
+    def _write_dict(self, obj, out, level):
+        if not obj:
+            out.append('{}')
+            return
+        keys = tuple(obj)
+        if not all(isinstance(key, str) for key in keys):
+            # keys of other types are converted as json does
+            self._write_text(obj, out, level)
+            return
+        ordered, parts = self._template(keys, level)
+        scalars = self._scalars
+        append = out.append
+        for part, key in zip(parts, ordered):
+            append(part)
+            value = obj[key]
+            encode = scalars.get(value.__class__)
+            if encode is not None:
+                append(encode(value))
+            else:
+                self.write(value, out, level + 1)
+        append(parts[-1])
+
+    def _write_list(self, obj, out, level):
+        if not obj:
+            out.append('[]')
+            return
+        inner = self._newline(level + 1)
+        separator = self.item_separator + inner
+        scalars = self._scalars
+        append = out.append
+        append('[' + inner)
+        for i, item in enumerate(obj):
+            if i:
+                append(separator)
+            encode = scalars.get(item.__class__)
+            if encode is not None:
+                append(encode(item))
+            else:
+                self.write(item, out, level + 1)
+        append(self._newline(level) + ']')
+
+    def _write_text(self, obj, out, level):
+        text = _json.dumps(obj, indent=self.indent,
+                           separators=(self.item_separator,
+                                       self.key_separator),
+                           sort_keys=self.sort_keys,
+                           ensure_ascii=self.ensure_ascii,
+                           default=lambda o: _plain(o))
+        if self.indent is not None and level:
+            text = text.replace('\n', self._newline(level))
+        out.append(text)
+
+
+def _float(value):
+    # as in the json module
+    if value != value:
+        return 'NaN'
+    if value == float('inf'):
+        return 'Infinity'
+    if value == -float('inf'):
+        return '-Infinity'
+    return float.__repr__(value)
+
+
+def _plain(obj):
+    if isinstance(obj, RawJSON):
+        return obj.data
+    return current_app.json_encoder().default(obj)
+
+
+_encoders = {}
+
+
+def get_encoder(indent=None, separators=None):
+    """Return the Encoder for the given formatting and the application's
+    JSON_SORT_KEYS and JSON_AS_ASCII settings. Encoders are built once and
+    keep their compiled dictionary layouts between requests."""
+    config = current_app.config
+    key = (indent, separators, config['JSON_SORT_KEYS'],
+           config['JSON_AS_ASCII'])
+    encoder = _encoders.get(key)
+    if encoder is None:
+        encoder = _encoders[key] = Encoder(
+            indent=indent, separators=separators,
+            sort_keys=config['JSON_SORT_KEYS'],
+            ensure_ascii=config['JSON_AS_ASCII'])
+    return encoder
+
+
+def dumps(obj, indent=None, separators=None):
+    """Encode obj as flask.json.dumps() does, writing RawJSON values out as
+    they are."""
+    return get_encoder(indent, separators).encode(obj)
+
+
+def jsonify(obj):
+    """Return a JSON response for obj, formatted as flask.jsonify() does,
+    with RawJSON values written out as they are."""
+    indent = None
+    separators = (',', ':')
+    if current_app.config['JSONIFY_PRETTYPRINT_REGULAR'] and \
+            not request.is_xhr:
+        indent = 2
+        separators = (', ', ': ')
+    return current_app.response_class(
+        (dumps(obj, indent=indent, separators=separators), '\n'),
+        mimetype=current_app.config['JSONIFY_MIMETYPE'])
@@ -0,0 +1,45 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_commit_receivers = []
+
+
+def on_commit(f):
+    """Register a function to be called after every successful commit.
+
+    The function receives a dictionary that maps the name of each table
+    written in the transaction to the set of operations applied to it
+    ('insert', 'update' and/or 'delete')."""
+    _commit_receivers.append(f)
+    return f
+
+
+def record_change(session, table, operation):
+    """Record a write that the ORM cannot see, such as a bulk insert issued
+    through session.execute(), so that commit receivers are notified."""
+    changes = session.info.setdefault('changes', {})
+    changes.setdefault(table, set()).add(operation)
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_flush(session, flush_context):
+    for operation, objects in (('insert', session.new),
+                               ('update', session.dirty),
+                               ('delete', session.deleted)):
+        for obj in objects:
+            table = getattr(obj, '__tablename__', None)
+            if table is not None:
+                record_change(session, table, operation)
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_commit(session):
+    changes = session.info.pop('changes', None)
+    if changes:
+        for receiver in _commit_receivers:
+            receiver(changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('changes', None)
@@ -0,0 +1,205 @@
+import numpy as np
+from flask import current_app, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+from . import db
+from .catalog import catalog
+from .decorators.caching import LRUCache
+from .models import Batch, Result, Sample
+from .urls import fast_url_for
+
+# exported statistics by scope, each tagged with the (table, id) pairs of
+# the batch, project and agency whose results it was computed from
+stats_cache = LRUCache(max_entries=1000)
+
+percentiles = (('p5', 5), ('p25', 25), ('median', 50), ('p75', 75),
+               ('p95', 95))
+
+
+def cohort_stats(scope, id):
+    """Return summary statistics of every indicator over the results of a
+    batch, project or agency, given as the name of its table and its id.
+
+    The content of the results is read in chunks into a results x
+    indicators matrix. The counts, means, standard deviations, extremes and
+    out of range counts are accumulated chunk by chunk, so the memory they
+    use does not depend on the size of the scope. Percentiles need every
+    value, so the values present in each column are kept, and only while
+    the scope has at most STATS_PERCENTILE_MAX_RESULTS results; the
+    percentiles of larger scopes are null. The output is cached until
+    results of the scope are written."""
+    key = (request.host_url, scope, id)
+    stats = stats_cache.get(key)
+    if stats is None:
+        stats = _compute(scope, id)
+        stats_cache.set(key, stats, tags=[(scope, id)],
+                        timeout=current_app.config.get('STATS_CACHE_TIMEOUT',
+                                                       300))
+    return stats
+
+
+class _Accumulator(object):
+    """Per-column statistics of a sequence of matrix chunks. The means and
+    the sums of squared deviations of the chunks are combined as in Chan et
+    al.'s parallel algorithm, which is as accurate as a single pass."""
+    def __init__(self, indicators, max_results):
+        columns = len(indicators.infos)
+        self.indicators = indicators
+        self.max_results = max_results
+        self.results = 0
+        self.counts = np.zeros(columns, dtype=np.int64)
+        self.means = np.zeros(columns)
+        self.m2 = np.zeros(columns)
+        self.minima = np.full(columns, np.nan)
+        self.maxima = np.full(columns, np.nan)
+        self.low = np.zeros(columns, dtype=np.int64)
+        self.high = np.zeros(columns, dtype=np.int64)
+        # values present in each column, for the percentiles, or None once
+        # there are too many results
+        self.values = [[] for i in range(columns)]
+
+    def add(self, values):
+        self.results += len(values)
+        present = ~np.isnan(values)
+        counts = present.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where(counts, np.where(present, values, 0).sum(axis=0) /
+                             counts, 0)
+            m2 = (np.where(present, values - means, 0) ** 2).sum(axis=0)
+            total = self.counts + counts
+            delta = means - self.means
+            self.means = np.where(total, self.means + delta * counts / total,
+                                  0)
+            self.m2 = self.m2 + m2 + np.where(
+                total, delta ** 2 * self.counts * counts / total, 0)
+            self.low += (values < self.indicators.ref_min).sum(axis=0)
+            self.high += (values > self.indicators.ref_max).sum(axis=0)
+        self.counts = total
+        # fmin and fmax ignore NaN
+        self.minima = np.fmin(self.minima, np.fmin.reduce(values, axis=0))
+        self.maxima = np.fmax(self.maxima, np.fmax.reduce(values, axis=0))
+        if self.values is not None and self.results > self.max_results:
+            self.values = None
+        if self.values is not None:
+            for column in np.flatnonzero(counts):
+                self.values[column].append(
+                    values[present[:, column], column])
+
+
+def _compute(scope, id):
+    indicators = catalog.get_indicators()
+    query = db.session.query(Result.content) \
+        .join(Sample, Result.sample_id == Sample.id)
+    if scope == 'batches':
+        query = query.filter(Sample.batch_id == id)
+    else:
+        column = Batch.project_id if scope == 'projects' \
+            else Batch.agency_id
+        query = query.join(Batch, Sample.batch_id == Batch.id) \
+            .filter(column == id)
+
+    config = current_app.config
+    chunk_size = config.get('EXPORT_CHUNK_SIZE', 1000)
+    totals = _Accumulator(indicators,
+                          config.get('STATS_PERCENTILE_MAX_RESULTS', 100000))
+    rows = []
+    for row in query.yield_per(chunk_size):
+        rows.append(row)
+        if len(rows) == chunk_size:
+            totals.add(indicators.matrix(rows))
+            rows = []
+    if rows:
+        totals.add(indicators.matrix(rows))
+
+    stats = []
+    for column in np.flatnonzero(totals.counts):
+        info = indicators.infos[column]
+        count = int(totals.counts[column])
+        item = {
+            'info_url': fast_url_for('api.get_info', id=info.id,
+                                     _external=True),
+            'alias': info.alias,
+            'count': count,
+            'mean': float(totals.means[column]),
+            'std': float(np.sqrt(totals.m2[column] / count)),
+            'min': float(totals.minima[column]),
+            'max': float(totals.maxima[column]),
+            'low': int(totals.low[column]),
+            'high': int(totals.high[column])
+        }
+        if totals.values is not None:
+            quantiles = np.percentile(
+                np.concatenate(totals.values[column]),
+                [q for name, q in percentiles])
+        else:
+            quantiles = [None] * len(percentiles)
+        for (name, q), value in zip(percentiles, quantiles):
+            item[name] = float(value) if value is not None else None
+        stats.append(item)
+    return {'results': totals.results, 'indicators': stats}
+
+
+def results_written(session):
+    """Record that results were written with session.execute(), which the
+    flush listeners below do not see. All the statistics are dropped when
+    the transaction commits, as the scopes of the results are not known."""
+    session.info['stats_scopes'] = None
+
+
+# a write to the results of a sample invalidates the statistics of its
+# batch, project and agency, which are looked up when the session is
+# flushed. Samples and batches that are deleted or moved can take results
+# to another scope, so they invalidate all the statistics.
+_scope_attributes = {
+    Sample: ('batch_id', 'batch'),
+    Batch: ('project_id', 'agency_id', 'project', 'agency')
+}
+
+
+def _moved(session, obj):
+    if obj in session.new:
+        return False
+    if obj in session.deleted:
+        return True
+    return any(get_history(obj, name).has_changes()
+               for name in _scope_attributes[type(obj)])
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_scopes(session, flush_context):
+    sample_ids = set()
+    for obj in list(session.new) + list(session.dirty) + \
+            list(session.deleted):
+        if isinstance(obj, Result):
+            sample_ids.add(obj.sample_id)
+            sample_ids.update(get_history(obj, 'sample_id').deleted)
+        elif type(obj) in _scope_attributes and _moved(session, obj):
+            session.info['stats_scopes'] = None
+            return
+    sample_ids.discard(None)
+    scopes = session.info.setdefault('stats_scopes', set())
+    if not sample_ids or scopes is None:
+        return
+    query = session.query(Batch.id, Batch.project_id, Batch.agency_id) \
+        .join(Sample, Sample.batch_id == Batch.id) \
+        .filter(Sample.id.in_(sample_ids)).distinct()
+    for batch_id, project_id, agency_id in query:
+        scopes.update([('batches', batch_id), ('projects', project_id),
+                       ('agencies', agency_id)])
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate(session):
+    if 'stats_scopes' not in session.info:
+        return
+    scopes = session.info.pop('stats_scopes')
+    if scopes is None:
+        stats_cache.clear()
+    elif scopes:
+        stats_cache.invalidate(scopes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_scopes(session):
+    session.info.pop('stats_scopes', None)
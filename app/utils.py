@@ -1,4 +1,7 @@
+import json
+from flask import request
 from flask.globals import _app_ctx_stack, _request_ctx_stack
+from sqlalchemy import inspect
 from werkzeug.urls import url_parse
 from werkzeug.exceptions import NotFound
 from .exceptions import ValidationError
@@ -30,4 +33,31 @@ def split_url(url, method='GET'):
         result = url_adapter.match(parsed_url.path, method)
     except NotFound:
         raise ValidationError('Invalid URL: ' + url)
-    return result
\ No newline at end of file
+    return result
+
+
+def read_items():
+    """Return the list of items in the body of a bulk request, given either
+    as a JSON array or as newline delimited JSON (application/x-ndjson)."""
+    if request.mimetype == 'application/x-ndjson':
+        items = []
+        for number, line in enumerate(
+                request.get_data(as_text=True).splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                raise ValidationError('Invalid JSON in line {0}'.format(
+                    number))
+        return items
+    items = request.get_json(silent=True)
+    if not isinstance(items, list):
+        raise ValidationError('Invalid request: expected a JSON array')
+    return items
+
+
+def primary_key(query):
+    """Return the primary key column of the model a query returns."""
+    entity = query.column_descriptions[0]['entity']
+    return inspect(entity).primary_key[0]
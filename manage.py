@@ -1,9 +1,12 @@
 import os
 from app import create_app, db
 from flask_script import Manager
-from flask_migrate import Migrate, MigrateCommand
+from flask_migrate import Migrate, MigrateCommand, upgrade
 from app import models
 app = create_app(config_name=os.getenv('APP_SETTINGS'))
+# commands run in a test request context, whose reads would otherwise go
+# to a replica, and the generator inserts ids based on what it reads
+app.config['SQLALCHEMY_USE_REPLICAS'] = False
 
 migrate = Migrate(app, db)
 manager = Manager(app)
@@ -11,5 +14,50 @@ manager = Manager(app)
 
 manager.add_command('db', MigrateCommand)
 
+
+@manager.option('-n', '--samples', dest='samples', type=int, default=10000,
+                help='number of samples to generate')
+@manager.option('--samples-per-batch', dest='samples_per_batch',
+                default='96', help='samples per batch, as n or min-max')
+@manager.option('--batches-per-agency', dest='batches_per_agency',
+                default='10-30', help='batches per agency, as n or min-max')
+@manager.option('--results-per-sample', dest='results_per_sample',
+                default='1', help='results per sample, as n or min-max')
+@manager.option('--indicators-per-result', dest='indicators_per_result',
+                default='20-60',
+                help='indicators in each result content, as n or min-max')
+@manager.option('--indicators', dest='indicators', type=int, default=100,
+                help='Info indicators to create if there are none')
+@manager.option('--seed', dest='seed', type=int, default=0,
+                help='random seed, the same seed gives the same data')
+def generate(samples, samples_per_batch, batches_per_agency,
+             results_per_sample, indicators_per_result, indicators, seed):
+    """Generate synthetic LIMS data with bulk inserts."""
+    from app.generator import generate
+    # the schema is brought up to date through the migrations, so that the
+    # database stays in step with their history
+    upgrade()
+    counts = generate(samples, samples_per_batch=samples_per_batch,
+                      batches_per_agency=batches_per_agency,
+                      results_per_sample=results_per_sample,
+                      indicators_per_result=indicators_per_result,
+                      indicators=indicators, seed=seed, log=print)
+    for table, count in sorted(counts.items()):
+        print('{0}: {1} rows'.format(table, count))
+
+
+@manager.option('-p', '--processes', dest='processes', type=int, default=None,
+                help='worker processes, one per CPU by default')
+@manager.option('--poll-interval', dest='poll_interval', type=float,
+                default=2, help='seconds between checks for new jobs')
+@manager.option('--once', dest='once', action='store_true', default=False,
+                help='exit when no job is left')
+def reports(processes, poll_interval, once):
+    """Generate the reports queued through the API."""
+    from app.reports import run_workers
+    run_workers(os.getenv('APP_SETTINGS'), processes=processes,
+                poll_interval=poll_interval, once=once, log=print)
+
+
 if __name__ == '__main__':
     manager.run()
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""Compress result content
+
+Revision ID: 8c2e4b7d9a13
+Revises: 0702a93b2b99
+Create Date: 2026-10-18 16:21:40.207316
+
+"""
+import json
+import zlib
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c2e4b7d9a13'
+down_revision = '0702a93b2b99'
+branch_labels = None
+depends_on = None
+
+CHUNK_SIZE = 1000
+
+
+def convert(column, new_column, new_type, function):
+    """Fill new_column of every result with function applied to the raw
+    value of column, reading and writing the results in chunks."""
+    connection = op.get_bind()
+    results = sa.table('results', sa.column('id', sa.Integer),
+                       sa.column(column), sa.column(new_column, new_type))
+    update = results.update().where(results.c.id == sa.bindparam('_id')) \
+        .values({new_column: sa.bindparam('_value')})
+    last = 0
+    while True:
+        rows = connection.execute(
+            sa.select([results.c.id, results.c[column]])
+            .where(results.c.id > last).order_by(results.c.id)
+            .limit(CHUNK_SIZE)).fetchall()
+        if not rows:
+            break
+        connection.execute(update, [{'_id': id, '_value': function(value)}
+                                    for id, value in rows])
+        last = rows[-1][0]
+
+
+def upgrade():
+    # indicators given by alias are keyed by Info id from now on
+    connection = op.get_bind()
+    infos = sa.table('infos', sa.column('id', sa.Integer),
+                     sa.column('alias', sa.String))
+    aliases = dict((alias, str(id)) for id, alias in connection.execute(
+        sa.select([infos.c.id, infos.c.alias])) if alias)
+
+    def compress(value):
+        if value is None:
+            return None
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        content = json.loads(value)
+        if isinstance(content, dict):
+            content = dict((aliases.get(key, key), item)
+                           for key, item in content.items())
+        return zlib.compress(json.dumps(
+            content, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+
+    with op.batch_alter_table('results') as batch_op:
+        batch_op.add_column(sa.Column('content_data',
+                                      sa.LargeBinary(length=16777215),
+                                      nullable=True))
+    convert('content', 'content_data', sa.LargeBinary, compress)
+    with op.batch_alter_table('results') as batch_op:
+        batch_op.drop_column('content')
+        batch_op.alter_column('content_data', new_column_name='content',
+                              existing_type=sa.LargeBinary(length=16777215))
+
+
+def downgrade():
+    def decompress(value):
+        if value is None:
+            return None
+        value = bytes(value)
+        try:
+            value = zlib.decompress(value)
+        except zlib.error:
+            # uncompressed JSON text written by older versions, which can
+            # be any JSON value
+            pass
+        return value.decode('utf-8')
+
+    with op.batch_alter_table('results') as batch_op:
+        batch_op.add_column(sa.Column(
+            'content_data', sa.JSON().with_variant(sa.Text(), 'sqlite'),
+            nullable=True))
+    convert('content', 'content_data', sa.Text, decompress)
+    with op.batch_alter_table('results') as batch_op:
+        batch_op.drop_column('content')
+        batch_op.alter_column(
+            'content_data', new_column_name='content',
+            existing_type=sa.JSON().with_variant(sa.Text(), 'sqlite'))